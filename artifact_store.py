@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+DEFAULT_ARTIFACT_DIR = "artifacts"
+DEFAULT_MAX_BYTES = 5 * 1024**3
+MAX_FILE_DIGESTS = 1024
+
+_file_digests = OrderedDict()
+_file_digests_lock = threading.Lock()
+
+
+def file_digest(path):
+    # Content hash of an input file, remembered per (path, size, mtime) so big background videos are read once,
+    # the most recently used MAX_FILE_DIGESTS are kept
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _file_digests_lock:
+        if signature in _file_digests:
+            _file_digests.move_to_end(signature)
+            return _file_digests[signature]
+
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024**2), b""):
+            hasher.update(block)
+
+    with _file_digests_lock:
+        _file_digests[signature] = hasher.hexdigest()
+        while len(_file_digests) > MAX_FILE_DIGESTS:
+            _file_digests.popitem(last=False)
+    return hasher.hexdigest()
+
+
+class ArtifactStore:
+    """Content-addressed store for the output of each pipeline stage: script text, WAV, SRT and MP4.
+
+    An artefact is keyed by a hash of its stage name and all of its inputs and parameters, input files are
+    hashed by content (see file_digest), so changing one stage's inputs only invalidates that stage and the
+    ones after it. Each artefact can carry JSON metadata, e.g. the TTS chunk timings. Least recently used
+    artefacts are evicted once the store grows past max_bytes.
+    """
+
+    def __init__(self, root=DEFAULT_ARTIFACT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, stage, **params):
+        payload = json.dumps([stage, params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key, suffix):
+        return os.path.join(self.root, f"{key}{suffix}")
+
+    def get(self, key, suffix):
+        # returns (path, metadata) of a stored artefact, or None
+        path = self.path(key, suffix)
+        if not os.path.exists(path):
+            return None
+        metadata = {}
+        if os.path.exists(self.path(key, ".json")):
+            try:
+                with open(self.path(key, ".json"), encoding="utf-8") as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):  # e.g. evicted or half written meanwhile
+                return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except FileNotFoundError:
+            return None
+        return path, metadata
+
+    def put(self, key, suffix, src_path, metadata=None):
+        # metadata goes in first, an artefact is only visible once its file is in place
+        if metadata:
+            self._write(key, ".json", lambda f: f.write(json.dumps(metadata).encode("utf-8")))
+        with open(src_path, "rb") as src:
+            path = self._write(key, suffix, lambda f: shutil.copyfileobj(src, f))
+        self.evict()
+        return path
+
+    def _write(self, key, suffix, write_fn):
+        with tempfile.NamedTemporaryFile(dir=self.root, suffix=".tmp", delete=False) as f:
+            write_fn(f)
+        os.replace(f.name, self.path(key, suffix))
+        return self.path(key, suffix)
+
+    def get_text(self, key):
+        hit = self.get(key, ".txt")
+        if hit is None:
+            return None
+        try:
+            with open(hit[0], encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:  # evicted since the lookup
+            return None
+
+    def put_text(self, key, text):
+        self._write(key, ".txt", lambda f: f.write(text.encode("utf-8")))
+        self.evict()
+
+    def cached(self, key, suffix, output_path, produce):
+        # On a hit the artefact is copied to output_path, on a miss produce(output_path) writes it there and
+        # may return metadata to store alongside. Returns the metadata either way.
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        hit = self.get(key, suffix)
+        if hit is not None:
+            path, metadata = hit
+            try:
+                shutil.copyfile(path, output_path)
+                return metadata
+            except FileNotFoundError:  # evicted by another thread since the lookup, a miss after all
+                pass
+        metadata = produce(output_path) or {}
+        self.put(key, suffix, output_path, metadata)
+        return metadata
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                key, suffix = os.path.splitext(name)
+                if suffix in (".json", ".tmp"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.root, name))
+                except FileNotFoundError:
+                    continue
+                sidecar = self.path(key, ".json")
+                size = stat.st_size + (os.path.getsize(sidecar) if os.path.exists(sidecar) else 0)
+                entries.append((stat.st_mtime, size, name, sidecar))
+            total = sum(size for _, size, _, _ in entries)
+            for _, size, name, sidecar in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                for path in (os.path.join(self.root, name), sidecar):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+
+artifact_store = None
+
+
+def get_artifact_store():
+    global artifact_store
+    if artifact_store is None:
+        artifact_store = ArtifactStore()
+    return artifact_store
@@ -0,0 +1,247 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from artifact_store import DEFAULT_ARTIFACT_DIR, ArtifactStore
+from config import load_api_key
+from subtitles import ASR_MODELS, DEFAULT_ASR_MODEL, make_srt
+from tts_engine import TTSEngine
+from video_render import DEFAULT_RENDER_PRESET, RENDER_PRESETS, render_video
+
+SUBTITLE_MODES = ["tts", "whisper", "none"]
+
+
+def load_manifest(path):
+    # One job per JSONL line or CSV row: id, prompt or script, voice (reference audio), video, and optionally
+    # ref_text, seed, subtitles (tts, whisper, none), asr_model, render_preset, gemini_model. Empty CSV cells mean
+    # default.
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    jobs, ids = [], set()
+    for i, row in enumerate(rows):
+        job = {key: value for key, value in row.items() if value not in (None, "")}
+        job["id"] = str(job.get("id", f"job_{i + 1:04}"))
+        if job["id"] in ids:  # each job owns <output_dir>/<id>/
+            raise ValueError(f"Duplicate job id {job['id']} in row {i + 1}")
+        ids.add(job["id"])
+        if "prompt" not in job and "script" not in job:
+            raise ValueError(f"Job {job['id']} needs a prompt or a script")
+        for key in ("voice", "video"):
+            if key not in job:
+                raise ValueError(f"Job {job['id']} has no {key}")
+        job.setdefault("subtitles", "tts")
+        if job["subtitles"] not in SUBTITLE_MODES:
+            raise ValueError(f"Job {job['id']}: unknown subtitles {job['subtitles']}, choose from {SUBTITLE_MODES}")
+        jobs.append(job)
+    return jobs
+
+
+class BatchPipeline:
+    """Runs jobs through the stages script -> tts -> subtitles -> render, each stage with its own worker pool.
+
+    A job is handed to the next stage as soon as it leaves the previous one, so while one job is voiced the
+    next one's script is generated and the previous one is rendered. A failed job is reported and dropped,
+    the others carry on. With an artifact store, a stage whose inputs are unchanged reuses its stored output.
+    """
+
+    def __init__(
+        self,
+        engine,
+        output_dir,
+        gemini_model=None,
+        asr_model=DEFAULT_ASR_MODEL,
+        render_preset=DEFAULT_RENDER_PRESET,
+        llm_workers=4,
+        asr_workers=1,
+        render_workers=2,
+        artifact_store=None,
+        seed=0,
+    ):
+        self.engine = engine
+        self.output_dir = output_dir
+        self.gemini_model = gemini_model
+        self.asr_model = asr_model
+        self.render_preset = render_preset
+        self.artifact_store = artifact_store
+        self.seed = seed
+
+        # LLM calls are I/O bound, the TTS model is shared and serialised anyway, ffmpeg is CPU bound
+        self.stages = [
+            ("script", self.write_script, ThreadPoolExecutor(llm_workers, thread_name_prefix="llm")),
+            ("tts", self.voice, ThreadPoolExecutor(1, thread_name_prefix="tts")),
+            ("subtitles", self.subtitle, ThreadPoolExecutor(asr_workers, thread_name_prefix="asr")),
+            ("render", self.render, ThreadPoolExecutor(render_workers, thread_name_prefix="render")),
+        ]
+        self.results = []
+        self.finished = 0
+        self.condition = threading.Condition()
+
+    def run(self, jobs):
+        self.results = [None] * len(jobs)
+        self.finished = 0
+        for index, job in enumerate(jobs):
+            job["index"] = index
+            job["dir"] = os.path.join(self.output_dir, job["id"])
+            job["timings"] = {}
+            os.makedirs(job["dir"], exist_ok=True)
+            self.submit(job, 0)
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.finished == len(jobs))
+        for _, _, executor in self.stages:
+            executor.shutdown()
+        return self.results
+
+    def submit(self, job, stage):
+        self.stages[stage][2].submit(self.run_stage, job, stage)
+
+    def run_stage(self, job, stage):
+        name, stage_fn, _ = self.stages[stage]
+        start = time.perf_counter()
+        try:
+            stage_fn(job)
+        except Exception as e:
+            traceback.print_exc()
+            self.finish(job, error=f"{name}: {e}")
+            return
+        job["timings"][name] = round(time.perf_counter() - start, 2)
+
+        if stage + 1 < len(self.stages):
+            self.submit(job, stage + 1)
+        else:
+            self.finish(job)
+
+    def finish(self, job, error=None):
+        result = {"id": job["id"], "status": "failed" if error else "done", "timings": job["timings"]}
+        if error:
+            result["error"] = error
+        else:
+            result["output"] = job["output"]
+        with self.condition:
+            self.results[job["index"]] = result
+            self.finished += 1
+            print(f"[{self.finished}/{len(self.results)}] {job['id']} {result['status']} {error or job['output']}")
+            self.condition.notify_all()
+
+    # stages, each one reads what the previous ones left on the job
+
+    def write_script(self, job):
+        if "script" in job:
+            job["text"] = job["script"]
+        else:
+            from text_generator import generate_script
+
+            model_name = job.get("gemini_model", self.gemini_model)
+            if self.artifact_store is None:
+                job["text"] = generate_script(job["prompt"], model_name)
+            else:
+                key = self.artifact_store.key("script", prompt=job["prompt"], model=model_name)
+                job["text"] = self.artifact_store.get_text(key)
+                if job["text"] is None:
+                    job["text"] = generate_script(job["prompt"], model_name)
+                    self.artifact_store.put_text(key, job["text"])
+        with open(os.path.join(job["dir"], "script.txt"), "w", encoding="utf-8") as f:
+            f.write(job["text"])
+
+    def voice(self, job):
+        job["audio"], job["chunk_segments"] = self.engine.generate(
+            job["text"],
+            job["voice"],
+            os.path.join(job["dir"], "audio.wav"),
+            ref_text=job.get("ref_text", ""),
+            seed=int(job.get("seed", self.seed)),
+        )
+
+    def subtitle(self, job):
+        if job["subtitles"] == "none":
+            job["srt"] = None
+            return
+        job["srt"] = make_srt(
+            os.path.join(job["dir"], "subtitles.srt"),
+            job["audio"],
+            job["chunk_segments"] if job["subtitles"] == "tts" else None,
+            job.get("asr_model", self.asr_model),
+            artifact_store=self.artifact_store,
+        )
+
+    def render(self, job):
+        job["output"] = render_video(
+            job["video"],
+            job["audio"],
+            os.path.join(job["dir"], "short.mp4"),
+            srt_path=job["srt"],
+            preset=job.get("render_preset", self.render_preset),
+            artifact_store=self.artifact_store,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a manifest of shorts without the UI")
+    parser.add_argument("manifest", help="JSONL or CSV file, one job per line/row")
+    parser.add_argument("--output_dir", default="batch_output", help="One sub-directory per job id")
+    parser.add_argument("--api_key", default=None, help="Gemini API key, default $GEMINI_API_KEY or config.json")
+    parser.add_argument("--gemini_model", default=None, help="Default Gemini model for jobs with a prompt")
+    parser.add_argument("--asr_model", default=DEFAULT_ASR_MODEL, choices=list(ASR_MODELS.keys()))
+    parser.add_argument("--render_preset", default=DEFAULT_RENDER_PRESET, choices=list(RENDER_PRESETS.keys()))
+    parser.add_argument("--device", default=None, help="Device for the TTS model")
+    parser.add_argument("--seed", default=0, type=int, help="TTS seed for jobs without one, -1 is random (uncached)")
+    parser.add_argument("--llm_workers", default=4, type=int, help="Concurrent Gemini requests")
+    parser.add_argument("--asr_workers", default=1, type=int, help="Concurrent subtitle jobs")
+    parser.add_argument("--render_workers", default=2, type=int, help="Concurrent ffmpeg renders")
+    parser.add_argument("--artifact_dir", default=DEFAULT_ARTIFACT_DIR, help="Stage outputs reused across runs")
+    parser.add_argument("--artifact_max_gb", default=5.0, type=float, help="Artifact store size before eviction")
+    parser.add_argument("--no_cache", action="store_true", help="Re-run every stage, don't read or fill the store")
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.manifest)
+
+    if any("script" not in job for job in jobs):
+        from text_generator import DEFAULT_GEMINI_MODEL, configure_gemini
+
+        api_key = args.api_key or os.environ.get("GEMINI_API_KEY") or load_api_key()
+        if not api_key:
+            parser.error("Jobs with a prompt need a Gemini API key (--api_key, $GEMINI_API_KEY or config.json)")
+        configure_gemini(api_key)
+        args.gemini_model = args.gemini_model or DEFAULT_GEMINI_MODEL
+
+    artifact_store = None if args.no_cache else ArtifactStore(args.artifact_dir, int(args.artifact_max_gb * 1024**3))
+
+    # The TTS model loads in the background while the first scripts are generated
+    engine = TTSEngine(device=args.device, artifact_store=artifact_store)
+    threading.Thread(target=engine.load, daemon=True).start()
+
+    start = time.perf_counter()
+    pipeline = BatchPipeline(
+        engine,
+        args.output_dir,
+        gemini_model=args.gemini_model,
+        asr_model=args.asr_model,
+        render_preset=args.render_preset,
+        llm_workers=args.llm_workers,
+        asr_workers=args.asr_workers,
+        render_workers=args.render_workers,
+        artifact_store=artifact_store,
+        seed=args.seed,
+    )
+    results = pipeline.run(jobs)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, "results.jsonl"), "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+    failed = sum(result["status"] == "failed" for result in results)
+    print(f"{len(results) - failed}/{len(results)} jobs done in {time.perf_counter() - start:.1f}s, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
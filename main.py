@@ -8,13 +8,14 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QUrl
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PyQt6.QtGui import QFont
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
 from config import save_api_key, load_api_key
-import subprocess
+from text_generator import GEMINI_MODELS, SAFETY_SETTINGS, PromptBlockedError, configure_gemini, generate_script
+from tts_engine import TTSEngine
+from artifact_store import get_artifact_store
+from subtitles import ASR_MODELS, DEFAULT_ASR_MODEL, make_srt
+from video_render import DEFAULT_RENDER_PRESET, RENDER_PRESETS, render_video
 import os
 import time
-import whisper
 from PyQt6.QtMultimediaWidgets import QVideoWidget
 
 class APIKeyScreen(QWidget):
@@ -101,16 +102,7 @@ class MainScreen(QWidget):
         self.model_combo = QComboBox()
         self.model_combo.setMinimumHeight(40)
         self.model_combo.setFont(font)
-        self.model_combo.addItems([
-            "gemini-pro",
-            "gemini-flash",
-            "gemini-1.5-pro",
-            "gemini-1.5-flash",
-            "gemini-1.5-pro-002",
-            "gemini-1.5-flash-002",
-            "gemini-2.0-flash-exp",
-            "gemini-1.5-flash-8b"
-        ])
+        self.model_combo.addItems(GEMINI_MODELS)
         left_column.addWidget(self.model_combo)
         
         left_column.addSpacing(20)
@@ -166,54 +158,46 @@ class MainScreen(QWidget):
         
         self.setLayout(layout)
 
+class EngineLoaderWorker(QThread):
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+
+    def run(self):
+        try:
+            self.engine.load()
+            self.finished.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+
 class AudioGenerationWorker(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
     
-    def __init__(self, text, ref_audio):
+    def __init__(self, engine, text, ref_audio):
         super().__init__()
+        self.engine = engine
         self.text = text
         self.ref_audio = ref_audio
+        self.chunk_segments = None
         
     def run(self):
         try:
-            command = [
-                "f5-tts_infer-cli",
-                "--model", "F5-TTS",
-                "--ref_audio", self.ref_audio,
-                "--ref_text", "",
-                "--gen_text", self.text,
-                "--output_dir", "tests",
-                "--output_file", "infer_cli_basic.wav"  # Set specific output filename
-            ]
+            output_path = os.path.join("tests", "infer_cli_basic.wav")
             
-            # Start the process
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
+            # Blocks until the engine loaded at startup is ready, then reports progress per text chunk,
+            # raises if generation fails (the output path may still hold an earlier run's audio)
+            audio_path, self.chunk_segments = self.engine.generate(
+                self.text,
+                self.ref_audio,
+                output_path,
+                progress_callback=self.progress.emit
             )
-            
-            # Monitor the process output
-            while True:
-                output = process.stderr.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    if "%" in output:
-                        try:
-                            progress = int(output.split("%")[0].split("\r")[-1].strip())
-                            self.progress.emit(progress)
-                        except:
-                            pass
-            
-            output_path = os.path.join("tests", "infer_cli_basic.wav")
-            if process.returncode == 0 and os.path.exists(output_path):
-                self.finished.emit(output_path)
-            else:
-                self.error.emit("Audio generation failed")
+            self.finished.emit(audio_path)
                 
         except Exception as e:
             self.error.emit(str(e))
@@ -467,6 +451,44 @@ class VideoProcessingScreen(QWidget):
         video_section.setLayout(video_layout)
         layout.addWidget(video_section)
         
+        # Subtitle source, TTS timing needs no ASR model and Whisper is the fallback when the text is unknown
+        subtitle_mode_layout = QHBoxLayout()
+        subtitle_mode_label = QLabel("Subtitles From:")
+        subtitle_mode_label.setFont(font)
+        subtitle_mode_layout.addWidget(subtitle_mode_label)
+        
+        self.subtitle_mode_combo = QComboBox()
+        self.subtitle_mode_combo.setFont(font)
+        self.subtitle_mode_combo.addItems(["TTS timing", "Whisper ASR", "No subtitles"])
+        subtitle_mode_layout.addWidget(self.subtitle_mode_combo)
+        layout.addLayout(subtitle_mode_layout)
+        
+        # Subtitle model selection
+        asr_model_layout = QHBoxLayout()
+        asr_model_label = QLabel("Subtitle Model:")
+        asr_model_label.setFont(font)
+        asr_model_layout.addWidget(asr_model_label)
+        
+        self.asr_model_combo = QComboBox()
+        self.asr_model_combo.setFont(font)
+        self.asr_model_combo.addItems(list(ASR_MODELS.keys()))
+        self.asr_model_combo.setCurrentText(DEFAULT_ASR_MODEL)
+        asr_model_layout.addWidget(self.asr_model_combo)
+        layout.addLayout(asr_model_layout)
+        
+        # Render preset, only used when subtitles are burned in, otherwise the video stream is copied
+        render_preset_layout = QHBoxLayout()
+        render_preset_label = QLabel("Render Preset:")
+        render_preset_label.setFont(font)
+        render_preset_layout.addWidget(render_preset_label)
+        
+        self.render_preset_combo = QComboBox()
+        self.render_preset_combo.setFont(font)
+        self.render_preset_combo.addItems(list(RENDER_PRESETS.keys()))
+        self.render_preset_combo.setCurrentText(DEFAULT_RENDER_PRESET)
+        render_preset_layout.addWidget(self.render_preset_combo)
+        layout.addLayout(render_preset_layout)
+        
         # Process button
         self.process_button = QPushButton("Process Video")
         self.process_button.setMinimumHeight(50)
@@ -532,49 +554,46 @@ class VideoProcessingWorker(QThread):
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
     
-    def __init__(self, video_path, audio_path):
+    def __init__(self, video_path, audio_path, asr_model=DEFAULT_ASR_MODEL, chunk_segments=None,
+                 burn_subtitles=True, render_preset=DEFAULT_RENDER_PRESET, artifact_store=None):
         super().__init__()
         self.video_path = video_path
         self.audio_path = audio_path
+        self.asr_model = asr_model
+        self.chunk_segments = chunk_segments
+        self.burn_subtitles = burn_subtitles
+        self.render_preset = render_preset
+        self.artifact_store = artifact_store
         
     def run(self):
         try:
             self.progress.emit(10)
             
-            # Load Whisper model and generate subtitles
-            model = whisper.load_model("large-v3")
-            result = model.transcribe(self.audio_path, task="transcribe")
-            
-            self.progress.emit(40)
-            
-            # Generate SRT file
-            srt_path = "subtitles.srt"
-            with open(srt_path, "w", encoding='utf-8') as srt_file:
-                for i, segment in enumerate(result["segments"]):
-                    srt_file.write(f"{i + 1}\n")
-                    start = f"{int(segment['start'] // 3600):02}:{int((segment['start'] % 3600) // 60):02}:{int(segment['start'] % 60):02},{int((segment['start'] % 1) * 1000):03}"
-                    end = f"{int(segment['end'] // 3600):02}:{int((segment['end'] % 3600) // 60):02}:{int(segment['end'] % 60):02},{int((segment['end'] % 1) * 1000):03}"
-                    srt_file.write(f"{start} --> {end}\n")
-                    srt_file.write(f"{segment['text']}\n\n")
+            srt_path = None
+            if self.burn_subtitles:
+                # Generate subtitles from the TTS chunk timings when known, otherwise with the cached ASR model,
+                # reused from the artifact store when the audio and subtitle source are unchanged
+                srt_path = make_srt(
+                    "subtitles.srt",
+                    self.audio_path,
+                    self.chunk_segments,
+                    self.asr_model,
+                    artifact_store=self.artifact_store
+                )
+                self.progress.emit(40)
             
             self.progress.emit(70)
             
-            # Process video with FFmpeg
-            output_path = "processed_video.mp4"
-            command = [
-                'ffmpeg',
-                '-i', self.video_path,
-                '-i', self.audio_path,
-                '-vf', f"subtitles={srt_path}:force_style='Alignment=10,Fontsize=15,PrimaryColour=&HFFFFFF&,BackColour=&H80000000&,BorderStyle=2,Outline=1,Shadow=0,MarginV=10,FontName=Arial'",
-                '-map', '0:v',
-                '-map', '1:a',
-                '-c:v', 'libx264',
-                '-c:a', 'aac',
-                '-y',
-                output_path
-            ]
-            
-            subprocess.run(command, check=True)
+            # Render in one FFmpeg pass, video looped or cut to the audio length, real progress from 70 to 100
+            output_path = render_video(
+                self.video_path,
+                self.audio_path,
+                "processed_video.mp4",
+                srt_path=srt_path,
+                preset=self.render_preset,
+                progress_callback=lambda fraction: self.progress.emit(70 + int(fraction * 30)),
+                artifact_store=self.artifact_store
+            )
             self.progress.emit(100)
             self.finished.emit(output_path)
             
@@ -606,6 +625,17 @@ class MainWindow(QMainWindow):
         # Setup connections
         self.setup_connections()
         
+        self.chunk_segments = None
+        
+        # Stage outputs (script, audio, subtitles, video) are reused when their inputs didn't change
+        self.artifact_store = get_artifact_store()
+        
+        # Load the TTS model once in the background so each generation only pays for inference
+        self.tts_engine = TTSEngine(artifact_store=self.artifact_store)
+        self.engine_loader = EngineLoaderWorker(self.tts_engine)
+        self.engine_loader.error.connect(self.engine_load_error)
+        self.engine_loader.start()
+        
         # Check for existing API key
         api_key = load_api_key()
         if api_key:
@@ -639,16 +669,8 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Warning", "Please enter an API key")
 
     def initialize_gemini(self, api_key):
-        genai.configure(api_key=api_key)
-        self.setup_safety_settings()
-
-    def setup_safety_settings(self):
-        self.safety_settings = {
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-        }
+        configure_gemini(api_key)
+        self.safety_settings = SAFETY_SETTINGS
 
     def generate_content(self):
         prompt = self.main_screen.prompt_input.toPlainText().strip()
@@ -657,16 +679,15 @@ class MainWindow(QMainWindow):
             return
             
         try:
-            model = genai.GenerativeModel(
-                self.main_screen.model_combo.currentText(),
-                safety_settings=self.safety_settings
-            )
-            response = model.generate_content(prompt)
-            
-            if response.prompt_feedback.block_reason:
-                self.main_screen.response_output.setText("Sorry, the prompt was blocked due to safety concerns.")
-            else:
-                self.main_screen.response_output.setText(response.text)
+            model_name = self.main_screen.model_combo.currentText()
+            # Generate always asks for a fresh script, the stored one is only reused by deterministic re-runs
+            # (batch_runner), which now get this latest take
+            script = generate_script(prompt, model_name, safety_settings=self.safety_settings)
+            key = self.artifact_store.key("script", prompt=prompt, model=model_name)
+            self.artifact_store.put_text(key, script)
+            self.main_screen.response_output.setText(script)
+        except PromptBlockedError as e:
+            self.main_screen.response_output.setText(str(e))
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
 
@@ -692,7 +713,7 @@ class MainWindow(QMainWindow):
             self.tts_screen.generate_button.setEnabled(False)
             
             # Create and start worker
-            self.worker = AudioGenerationWorker(generated_text, ref_audio)
+            self.worker = AudioGenerationWorker(self.tts_engine, generated_text, ref_audio)
             self.worker.progress.connect(self.update_progress)
             self.worker.finished.connect(self.audio_generation_finished)
             self.worker.error.connect(self.audio_generation_error)
@@ -701,11 +722,15 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to generate audio: {str(e)}")
             
+    def engine_load_error(self, error_message):
+        QMessageBox.critical(self, "Error", f"Failed to load TTS model: {error_message}")
+            
     def update_progress(self, value):
         self.tts_screen.progress_bar.setValue(value)
         
     def audio_generation_finished(self, output_file):
         try:
+            self.chunk_segments = self.worker.chunk_segments
             self.tts_screen.progress_bar.hide()
             self.tts_screen.generate_button.setEnabled(True)
             self.tts_screen.download_button.show()
@@ -763,9 +788,15 @@ class MainWindow(QMainWindow):
         self.video_screen.progress_bar.setValue(0)
         self.video_screen.process_button.setEnabled(False)
         
+        subtitle_mode = self.video_screen.subtitle_mode_combo.currentText()
         self.video_worker = VideoProcessingWorker(
             video_path,
-            os.path.join("tests", "infer_cli_basic.wav")
+            os.path.join("tests", "infer_cli_basic.wav"),
+            self.video_screen.asr_model_combo.currentText(),
+            self.chunk_segments if subtitle_mode == "TTS timing" else None,
+            burn_subtitles=subtitle_mode != "No subtitles",
+            render_preset=self.video_screen.render_preset_combo.currentText(),
+            artifact_store=self.artifact_store
         )
         self.video_worker.progress.connect(self.video_screen.progress_bar.setValue)
         self.video_worker.finished.connect(self.video_processing_finished)
@@ -11,7 +11,7 @@ from f5_tts.infer.utils_infer import (
     infer_process,
     load_model,
     load_vocoder,
-    preprocess_ref_audio_text,
+    prepare_voice_prompt,
     remove_silence_for_generated_wav,
     save_spectrogram,
     transcribe,
@@ -33,12 +33,15 @@ class F5TTS:
         local_path=None,
         device=None,
         hf_cache_dir=None,
+        precision="auto",
     ):
         # Initialize parameters
         self.final_wave = None
         self.target_sample_rate = target_sample_rate
         self.hop_length = hop_length
         self.seed = -1
+        self.chunk_segments = []
+        self.bucket_stats = {}
         self.mel_spec_type = vocoder_name
 
         # Set device
@@ -52,13 +55,22 @@ class F5TTS:
         # Load models
         self.load_vocoder_model(vocoder_name, local_path=local_path, hf_cache_dir=hf_cache_dir)
         self.load_ema_model(
-            model_type, ckpt_file, vocoder_name, vocab_file, ode_method, use_ema, hf_cache_dir=hf_cache_dir
+            model_type,
+            ckpt_file,
+            vocoder_name,
+            vocab_file,
+            ode_method,
+            use_ema,
+            hf_cache_dir=hf_cache_dir,
+            precision=precision,
         )
 
     def load_vocoder_model(self, vocoder_name, local_path=None, hf_cache_dir=None):
         self.vocoder = load_vocoder(vocoder_name, local_path is not None, local_path, self.device, hf_cache_dir)
 
-    def load_ema_model(self, model_type, ckpt_file, mel_spec_type, vocab_file, ode_method, use_ema, hf_cache_dir=None):
+    def load_ema_model(
+        self, model_type, ckpt_file, mel_spec_type, vocab_file, ode_method, use_ema, hf_cache_dir=None, precision="auto"
+    ):
         if model_type == "F5-TTS":
             if not ckpt_file:
                 if mel_spec_type == "vocos":
@@ -82,7 +94,7 @@ class F5TTS:
             raise ValueError(f"Unknown model type: {model_type}")
 
         self.ema_model = load_model(
-            model_cls, model_cfg, ckpt_file, mel_spec_type, vocab_file, ode_method, use_ema, self.device
+            model_cls, model_cfg, ckpt_file, mel_spec_type, vocab_file, ode_method, use_ema, self.device, precision
         )
 
     def transcribe(self, ref_audio, language=None):
@@ -106,6 +118,7 @@ class F5TTS:
         progress=tqdm,
         target_rms=0.1,
         cross_fade_duration=0.15,
+        fade_shape="linear",
         sway_sampling_coef=-1,
         cfg_strength=2,
         nfe_step=32,
@@ -115,17 +128,37 @@ class F5TTS:
         file_wave=None,
         file_spect=None,
         seed=-1,
+        batch_size=1,
+        fused_cfg=False,
+        ode_solver=None,
+        nfe_preset=None,
+        duration_buckets=None,
+        vocoder_window_frames=512,
     ):
         if seed == -1:
             seed = random.randint(0, sys.maxsize)
         seed_everything(seed)
         self.seed = seed
 
-        ref_file, ref_text = preprocess_ref_audio_text(ref_file, ref_text, device=self.device)
-
-        wav, sr, spect = infer_process(
+        # prepared wave, mel and ref_text are cached on disk per voice, so a reused voice skips preprocessing
+        voice_prompt = prepare_voice_prompt(
             ref_file,
             ref_text,
+            self.ema_model,
+            mel_spec_type=self.mel_spec_type,
+            target_rms=target_rms,
+            show_info=show_info,
+            device=self.device,
+        )
+
+        # (text, start, end) of each generated chunk, usable as subtitle timings without running ASR
+        self.chunk_segments = []
+        # duration bucket occupancy of this call when buckets are used, see format_bucket_stats
+        self.bucket_stats = {}
+
+        wav, sr, spect = infer_process(
+            voice_prompt,
+            voice_prompt["ref_text"],
             gen_text,
             self.ema_model,
             self.vocoder,
@@ -134,12 +167,21 @@ class F5TTS:
             progress=progress,
             target_rms=target_rms,
             cross_fade_duration=cross_fade_duration,
+            fade_shape=fade_shape,
             nfe_step=nfe_step,
             cfg_strength=cfg_strength,
             sway_sampling_coef=sway_sampling_coef,
             speed=speed,
             fix_duration=fix_duration,
             device=self.device,
+            chunk_segments=self.chunk_segments,
+            batch_size=batch_size,
+            fused_cfg=fused_cfg,
+            ode_solver=ode_solver,
+            nfe_preset=nfe_preset,
+            duration_buckets=duration_buckets,
+            vocoder_window_frames=vocoder_window_frames,
+            bucket_stats=self.bucket_stats,
         )
 
         if file_wave is not None:
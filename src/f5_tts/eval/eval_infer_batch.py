@@ -17,12 +17,12 @@ from f5_tts.eval.utils_eval import (
     get_librispeech_test_clean_metainfo,
     get_seedtts_testset_metainfo,
 )
-from f5_tts.infer.utils_infer import load_checkpoint, load_vocoder
+from f5_tts.infer.utils_infer import load_checkpoint, load_vocoder, quantize_model
 from f5_tts.model import CFM, DiT, UNetT
+from f5_tts.model.solvers import get_nfe_preset
 from f5_tts.model.utils import get_tokenizer
 
 accelerator = Accelerator()
-device = f"cuda:{accelerator.process_index}"
 
 
 # --------------------- Dataset Settings -------------------- #
@@ -52,8 +52,11 @@ def main():
     parser.add_argument("-nfe", "--nfestep", default=32, type=int)
     parser.add_argument("-o", "--odemethod", default="euler")
     parser.add_argument("-ss", "--swaysampling", default=-1, type=float)
+    parser.add_argument("-sv", "--solver", default=None, choices=["euler", "midpoint", "heun", "multistep"])
+    parser.add_argument("-pr", "--preset", default=None, choices=["nfe8", "nfe12", "nfe16"])
 
     parser.add_argument("-t", "--testset", required=True)
+    parser.add_argument("-q", "--quantize", action="store_true", help="int8 dynamic quantized backbone, runs on cpu")
 
     args = parser.parse_args()
 
@@ -68,8 +71,13 @@ def main():
     nfe_step = args.nfestep
     ode_method = args.odemethod
     sway_sampling_coef = args.swaysampling
+    solver = args.solver
+    if args.preset is not None:  # solver and nfe shortcut on the default sway -1 schedule
+        solver, nfe_step, sway_sampling_coef = get_nfe_preset(args.preset)
 
     testset = args.testset
+    quantize = args.quantize
+    device = "cpu" if quantize else f"cuda:{accelerator.process_index}"  # int8 dynamic kernels are cpu only
 
     infer_batch_size = 1  # max frames. 1 for ddp single inference (recommended)
     cfg_strength = 2.0
@@ -102,11 +110,12 @@ def main():
     output_dir = (
         f"{rel_path}/"
         f"results/{exp_name}_{ckpt_step}/{testset}/"
-        f"seed{seed}_{ode_method}_nfe{nfe_step}_{mel_spec_type}"
+        f"seed{seed}_{solver or ode_method}_nfe{nfe_step}_{mel_spec_type}"
         f"{f'_ss{sway_sampling_coef}' if sway_sampling_coef else ''}"
         f"_cfg{cfg_strength}_speed{speed}"
         f"{'_gt-dur' if use_truth_duration else ''}"
         f"{'_no-ref-audio' if no_ref_audio else ''}"
+        f"{'_int8' if quantize else ''}"
     )
 
     # -------------------------------------------------#
@@ -132,7 +141,7 @@ def main():
         vocoder_local_path = "../checkpoints/charactr/vocos-mel-24khz"
     elif mel_spec_type == "bigvgan":
         vocoder_local_path = "../checkpoints/bigvgan_v2_24khz_100band_256x"
-    vocoder = load_vocoder(vocoder_name=mel_spec_type, is_local=local, local_path=vocoder_local_path)
+    vocoder = load_vocoder(vocoder_name=mel_spec_type, is_local=local, local_path=vocoder_local_path, device=device)
 
     # Tokenizer
     vocab_char_map, vocab_size = get_tokenizer(dataset_name, tokenizer)
@@ -154,8 +163,10 @@ def main():
         vocab_char_map=vocab_char_map,
     ).to(device)
 
-    dtype = torch.float32 if mel_spec_type == "bigvgan" else None
+    dtype = torch.float32 if mel_spec_type == "bigvgan" or quantize else None
     model = load_checkpoint(model, ckpt_path, device, dtype=dtype, use_ema=use_ema)
+    if quantize:
+        model = quantize_model(model.to("cpu", torch.float32))
 
     if not os.path.exists(output_dir) and accelerator.is_main_process:
         os.makedirs(output_dir)
@@ -167,9 +178,9 @@ def main():
     with accelerator.split_between_processes(prompts_all) as prompts:
         for prompt in tqdm(prompts, disable=not accelerator.is_local_main_process):
             utts, ref_rms_list, ref_mels, ref_mel_lens, total_mel_lens, final_text_list = prompt
-            ref_mels = ref_mels.to(device)
-            ref_mel_lens = torch.tensor(ref_mel_lens, dtype=torch.long).to(device)
-            total_mel_lens = torch.tensor(total_mel_lens, dtype=torch.long).to(device)
+            ref_mels = ref_mels.to(model.device)
+            ref_mel_lens = torch.tensor(ref_mel_lens, dtype=torch.long).to(model.device)
+            total_mel_lens = torch.tensor(total_mel_lens, dtype=torch.long).to(model.device)
 
             # Inference
             with torch.inference_mode():
@@ -183,6 +194,8 @@ def main():
                     sway_sampling_coef=sway_sampling_coef,
                     no_ref_audio=no_ref_audio,
                     seed=seed,
+                    solver=solver,
+                    keep_trajectory=False,
                 )
                 # Final result
                 for i, gen in enumerate(generated):
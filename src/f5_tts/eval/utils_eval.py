@@ -54,16 +54,12 @@ def get_librispeech_test_clean_metainfo(metalst, librispeech_test_clean_path):
     return metainfo
 
 
-# padded to max length mel batch
-def padded_mel_batch(ref_mels):
-    max_mel_length = torch.LongTensor([mel.shape[-1] for mel in ref_mels]).amax()
-    padded_ref_mels = []
-    for mel in ref_mels:
-        padded_ref_mel = F.pad(mel, (0, max_mel_length - mel.shape[-1]), value=0)
-        padded_ref_mels.append(padded_ref_mel)
-    padded_ref_mels = torch.stack(padded_ref_mels)
-    padded_ref_mels = padded_ref_mels.permute(0, 2, 1)
-    return padded_ref_mels
+# mel batch computed in one pass from a list of waves, zero padded to max length
+def batched_ref_mels(mel_spectrogram, ref_audios):
+    ref_mels, ref_mel_frames = mel_spectrogram.forward_batch(ref_audios)
+    frames = torch.arange(ref_mels.shape[-1], device=ref_mels.device)
+    ref_mels = ref_mels.masked_fill(frames[None, None, :] >= ref_mel_frames[:, None, None], 0.0)
+    return ref_mels.permute(0, 2, 1)
 
 
 # get prompts from metainfo containing: utt, prompt_text, prompt_wav, gt_text, gt_wav
@@ -93,7 +89,7 @@ def get_inference_prompt(
     max_tokens = max_secs * target_sample_rate // hop_length
 
     batch_accum = [0] * num_buckets
-    utts, ref_rms_list, ref_mels, ref_mel_lens, total_mel_lens, final_text_list = (
+    utts, ref_rms_list, ref_audios, ref_mel_lens, total_mel_lens, final_text_list = (
         [[] for _ in range(num_buckets)] for _ in range(6)
     )
 
@@ -142,9 +138,7 @@ def get_inference_prompt(
             gen_text_len = len(gt_text.encode("utf-8"))
             total_mel_len = ref_mel_len + int(ref_mel_len / ref_text_len * gen_text_len / speed)
 
-        # to mel spectrogram
-        ref_mel = mel_spectrogram(ref_audio)
-        ref_mel = ref_mel.squeeze(0)
+        # to mel spectrogram, done per batch with batched_ref_mels()
 
         # deal with batch
         assert infer_batch_size > 0, "infer_batch_size should be greater than 0."
@@ -155,7 +149,7 @@ def get_inference_prompt(
 
         utts[bucket_i].append(utt)
         ref_rms_list[bucket_i].append(ref_rms)
-        ref_mels[bucket_i].append(ref_mel)
+        ref_audios[bucket_i].append(ref_audio)
         ref_mel_lens[bucket_i].append(ref_mel_len)
         total_mel_lens[bucket_i].append(total_mel_len)
         final_text_list[bucket_i].extend(text_list)
@@ -163,12 +157,11 @@ def get_inference_prompt(
         batch_accum[bucket_i] += total_mel_len
 
         if batch_accum[bucket_i] >= infer_batch_size:
-            # print(f"\n{len(ref_mels[bucket_i][0][0])}\n{ref_mel_lens[bucket_i]}\n{total_mel_lens[bucket_i]}")
             prompts_all.append(
                 (
                     utts[bucket_i],
                     ref_rms_list[bucket_i],
-                    padded_mel_batch(ref_mels[bucket_i]),
+                    batched_ref_mels(mel_spectrogram, ref_audios[bucket_i]),
                     ref_mel_lens[bucket_i],
                     total_mel_lens[bucket_i],
                     final_text_list[bucket_i],
@@ -178,7 +171,7 @@ def get_inference_prompt(
             (
                 utts[bucket_i],
                 ref_rms_list[bucket_i],
-                ref_mels[bucket_i],
+                ref_audios[bucket_i],
                 ref_mel_lens[bucket_i],
                 total_mel_lens[bucket_i],
                 final_text_list[bucket_i],
@@ -191,7 +184,7 @@ def get_inference_prompt(
                 (
                     utts[bucket_i],
                     ref_rms_list[bucket_i],
-                    padded_mel_batch(ref_mels[bucket_i]),
+                    batched_ref_mels(mel_spectrogram, ref_audios[bucket_i]),
                     ref_mel_lens[bucket_i],
                     total_mel_lens[bucket_i],
                     final_text_list[bucket_i],
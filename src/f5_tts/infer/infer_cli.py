@@ -6,7 +6,6 @@ from datetime import datetime
 from importlib.resources import files
 from pathlib import Path
 
-import numpy as np
 import soundfile as sf
 import tomli
 from cached_path import cached_path
@@ -16,16 +15,21 @@ from f5_tts.infer.utils_infer import (
     mel_spec_type,
     target_rms,
     cross_fade_duration,
+    fade_shape,
     nfe_step,
     cfg_strength,
     sway_sampling_coef,
     speed,
     fix_duration,
+    precision,
+    vocoder_window_frames,
+    format_bucket_stats,
     infer_process,
     load_model,
     load_vocoder,
     preprocess_ref_audio_text,
     remove_silence_for_generated_wav,
+    stitch_waves,
 )
 from f5_tts.model import DiT, UNetT
 
@@ -137,6 +141,12 @@ parser.add_argument(
     type=float,
     help=f"Duration of cross-fade between audio segments in seconds, default {cross_fade_duration}",
 )
+parser.add_argument(
+    "--fade_shape",
+    type=str,
+    choices=["linear", "equal_power"],
+    help=f"Shape of the cross-fade curves, equal_power keeps the loudness through the overlap, default {fade_shape}",
+)
 parser.add_argument(
     "--nfe_step",
     type=int,
@@ -162,6 +172,47 @@ parser.add_argument(
     type=float,
     help=f"Fix the total duration (ref and gen audios) in seconds, default {fix_duration}",
 )
+parser.add_argument(
+    "--batch_size",
+    type=int,
+    help="Number of text chunks of similar length sampled together in one forward pass, default 1",
+)
+parser.add_argument(
+    "--fused_cfg",
+    action="store_true",
+    help="Run the conditional and unconditional cfg passes as one batched forward pass",
+)
+parser.add_argument(
+    "--ode_solver",
+    type=str,
+    choices=["euler", "midpoint", "heun", "multistep"],
+    help="In-house ODE solver instead of torchdiffeq, multistep reuses the previous step's velocity",
+)
+parser.add_argument(
+    "--nfe_preset",
+    type=str,
+    choices=["nfe8", "nfe12", "nfe16"],
+    help="Fewer-step shortcut for a solver and step count on the default sway -1 schedule, "
+    "overrides --ode_solver, --nfe_step and --sway_sampling_coef",
+)
+parser.add_argument(
+    "--duration_buckets",
+    type=int,
+    nargs="+",
+    help="Round total chunk durations (frames) up to these buckets, for static shapes, e.g. 512 1024 2048 4096",
+)
+parser.add_argument(
+    "--vocoder_window_frames",
+    type=int,
+    help=f"Mel frames per vocoder call, overlapping windows are cross-faded, 0 vocodes whole chunks, "
+    f"default {vocoder_window_frames}",
+)
+parser.add_argument(
+    "--precision",
+    type=str,
+    choices=["auto", "fp32", "fp16", "bf16"],
+    help="Precision of the model weights and ODE state, bf16 autocasts on cpu, vocoder stays fp32, default auto",
+)
 args = parser.parse_args()
 
 
@@ -198,11 +249,23 @@ load_vocoder_from_local = args.load_vocoder_from_local or config.get("load_vocod
 vocoder_name = args.vocoder_name or config.get("vocoder_name", mel_spec_type)
 target_rms = args.target_rms or config.get("target_rms", target_rms)
 cross_fade_duration = args.cross_fade_duration or config.get("cross_fade_duration", cross_fade_duration)
+fade_shape = args.fade_shape or config.get("fade_shape", fade_shape)
 nfe_step = args.nfe_step or config.get("nfe_step", nfe_step)
 cfg_strength = args.cfg_strength or config.get("cfg_strength", cfg_strength)
 sway_sampling_coef = args.sway_sampling_coef or config.get("sway_sampling_coef", sway_sampling_coef)
 speed = args.speed or config.get("speed", speed)
 fix_duration = args.fix_duration or config.get("fix_duration", fix_duration)
+batch_size = args.batch_size or config.get("batch_size", 1)
+fused_cfg = args.fused_cfg or config.get("fused_cfg", False)
+ode_solver = args.ode_solver or config.get("ode_solver", None)
+nfe_preset = args.nfe_preset or config.get("nfe_preset", None)
+duration_buckets = args.duration_buckets or config.get("duration_buckets", None)
+vocoder_window_frames = (
+    args.vocoder_window_frames
+    if args.vocoder_window_frames is not None
+    else config.get("vocoder_window_frames", vocoder_window_frames)
+)
+precision = args.precision or config.get("precision", precision)
 
 
 # patches for pip pkg user
@@ -274,7 +337,9 @@ elif model == "E2-TTS":
         # ckpt_file = f"ckpts/{exp_name}/model_{ckpt_step}.pt"  # .pt | .safetensors; local path
 
 print(f"Using {model}...")
-ema_model = load_model(model_cls, model_cfg, ckpt_file, mel_spec_type=vocoder_name, vocab_file=vocab_file)
+ema_model = load_model(
+    model_cls, model_cfg, ckpt_file, mel_spec_type=vocoder_name, vocab_file=vocab_file, precision=precision
+)
 
 
 # inference process
@@ -296,6 +361,7 @@ def main():
         print("ref_audio_", voices[voice]["ref_audio"], "\n\n")
 
     generated_audio_segments = []
+    bucket_stats = {}
     reg1 = r"(?=\[\w+\])"
     chunks = re.split(reg1, gen_text)
     reg2 = r"\[(\w+)\]"
@@ -325,11 +391,19 @@ def main():
             mel_spec_type=vocoder_name,
             target_rms=target_rms,
             cross_fade_duration=cross_fade_duration,
+            fade_shape=fade_shape,
             nfe_step=nfe_step,
             cfg_strength=cfg_strength,
             sway_sampling_coef=sway_sampling_coef,
             speed=speed,
             fix_duration=fix_duration,
+            batch_size=batch_size,
+            fused_cfg=fused_cfg,
+            ode_solver=ode_solver,
+            nfe_preset=nfe_preset,
+            duration_buckets=duration_buckets,
+            vocoder_window_frames=vocoder_window_frames,
+            bucket_stats=bucket_stats,
         )
         generated_audio_segments.append(audio_segment)
 
@@ -342,8 +416,12 @@ def main():
                 final_sample_rate,
             )
 
+    if bucket_stats:
+        print(format_bucket_stats(bucket_stats))
+
     if generated_audio_segments:
-        final_wave = np.concatenate(generated_audio_segments)
+        # voice segments are joined back to back, as before, but into one preallocated buffer
+        final_wave, _ = stitch_waves(generated_audio_segments, cross_fade_duration=0)
 
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
@@ -119,6 +119,7 @@ def infer(
     nfe_step=32,
     speed=1,
     show_info=gr.Info,
+    fade_shape="linear",
 ):
     if not ref_audio_orig:
         gr.Warning("Please provide reference audio.")
@@ -154,6 +155,7 @@ def infer(
         ema_model,
         vocoder,
         cross_fade_duration=cross_fade_duration,
+        fade_shape=fade_shape,
         nfe_step=nfe_step,
         speed=speed,
         show_info=show_info,
@@ -224,6 +226,12 @@ with gr.Blocks() as app_tts:
             step=0.01,
             info="Set the duration of the cross-fade between audio clips.",
         )
+        fade_shape_radio = gr.Radio(
+            label="Cross-Fade Shape",
+            choices=["linear", "equal_power"],
+            value="linear",
+            info="Equal power keeps the loudness constant through the cross-fade.",
+        )
 
     audio_output = gr.Audio(label="Synthesized Audio")
     spectrogram_output = gr.Image(label="Spectrogram")
@@ -237,6 +245,7 @@ with gr.Blocks() as app_tts:
         cross_fade_duration_slider,
         nfe_slider,
         speed_slider,
+        fade_shape_radio,
     ):
         audio_out, spectrogram_path, ref_text_out = infer(
             ref_audio_input,
@@ -247,6 +256,7 @@ with gr.Blocks() as app_tts:
             cross_fade_duration=cross_fade_duration_slider,
             nfe_step=nfe_slider,
             speed=speed_slider,
+            fade_shape=fade_shape_radio,
         )
         return audio_out, spectrogram_path, ref_text_out
 
@@ -260,6 +270,7 @@ with gr.Blocks() as app_tts:
             cross_fade_duration_slider,
             nfe_slider,
             speed_slider,
+            fade_shape_radio,
         ],
         outputs=[audio_output, spectrogram_output, ref_text_input],
     )
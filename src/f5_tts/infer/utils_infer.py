@@ -6,9 +6,15 @@ import sys
 os.environ["PYTOCH_ENABLE_MPS_FALLBACK"] = "1"  # for MPS device compatibility
 sys.path.append(f"{os.path.dirname(os.path.abspath(__file__))}/../../third_party/BigVGAN/")
 
+import gc
 import hashlib
+import math
 import re
 import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from importlib.resources import files
 
 import matplotlib
@@ -24,11 +30,14 @@ from huggingface_hub import snapshot_download, hf_hub_download
 from pydub import AudioSegment, silence
 from transformers import pipeline
 from vocos import Vocos
+from torch.nn.utils.rnn import pad_sequence
 
 from f5_tts.model import CFM
+from f5_tts.model.solvers import get_nfe_preset
 from f5_tts.model.utils import (
     get_tokenizer,
     convert_char_to_pinyin,
+    lens_to_mask,
 )
 
 _ref_audio_cache = {}
@@ -45,12 +54,18 @@ n_fft = 1024
 mel_spec_type = "vocos"
 target_rms = 0.1
 cross_fade_duration = 0.15
+fade_shape = "linear"  # linear, equal_power
 ode_method = "euler"
+precision = "auto"  # auto, fp32, fp16, bf16
 nfe_step = 32  # 16, 32
 cfg_strength = 2.0
 sway_sampling_coef = -1.0
 speed = 1.0
 fix_duration = None
+max_duration = 4096
+seq_len_buckets = (512, 768, 1024, 1280, 1536, 2048, 2560, 3072, 4096)  # frames, for the compiled path
+vocoder_window_frames = 512  # mel frames per vocoder call, None decodes a chunk in one call
+vocoder_overlap_frames = 48
 
 # -----------------------------------------
 
@@ -131,47 +146,120 @@ def load_vocoder(vocoder_name="vocos", is_local=False, local_path="", device=dev
 
 
 # load asr pipeline
+# pipelines are shared process-wide, keyed by (model, device), and the least recently used one is evicted
+# two fit the common case of the ref text model next to another subtitle model without reloading either
+
+asr_model_name = "openai/whisper-large-v3-turbo"
+asr_cache_size = 2
 
 asr_pipe = None
+_asr_pipes = OrderedDict()
+_asr_pipes_lock = threading.Lock()
 
 
-def initialize_asr_pipeline(device: str = device, dtype=None):
-    if dtype is None:
-        dtype = (
-            torch.float16
-            if "cuda" in device
-            and torch.cuda.get_device_properties(device).major >= 6
-            and not torch.cuda.get_device_name().endswith("[ZLUDA]")
-            else torch.float32
-        )
+def _evict_asr_pipes(keep):
+    # call with _asr_pipes_lock held, drops least recently used pipelines until `keep` are left
     global asr_pipe
-    asr_pipe = pipeline(
-        "automatic-speech-recognition",
-        model="openai/whisper-large-v3-turbo",
-        torch_dtype=dtype,
-        device=device,
-    )
+    evicted = False
+    while len(_asr_pipes) > keep:
+        _, pipe = _asr_pipes.popitem(last=False)
+        if pipe is asr_pipe:
+            asr_pipe = None
+        del pipe
+        evicted = True
+    if evicted:
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+def get_asr_pipeline(model_name: str = asr_model_name, device: str = device, dtype=None):
+    global asr_pipe
+    key = (model_name, str(device))
+    with _asr_pipes_lock:
+        if key in _asr_pipes:
+            _asr_pipes.move_to_end(key)
+            asr_pipe = _asr_pipes[key]
+            return asr_pipe
+
+        # make room before loading, so a model switch never holds one copy more than the cache size
+        _evict_asr_pipes(max(asr_cache_size, 1) - 1)
+
+        if dtype is None:
+            dtype = (
+                torch.float16
+                if "cuda" in device
+                and torch.cuda.get_device_properties(device).major >= 6
+                and not torch.cuda.get_device_name().endswith("[ZLUDA]")
+                else torch.float32
+            )
+        asr_pipe = pipeline(
+            "automatic-speech-recognition",
+            model=model_name,
+            torch_dtype=dtype,
+            device=device,
+        )
+        _asr_pipes[key] = asr_pipe
+        return asr_pipe
+
+
+def initialize_asr_pipeline(device: str = device, dtype=None, model_name: str = asr_model_name):
+    get_asr_pipeline(model_name, device=device, dtype=dtype)
 
 
 # transcribe
 
 
-def transcribe(ref_audio, language=None):
-    global asr_pipe
-    if asr_pipe is None:
-        initialize_asr_pipeline(device=device)
-    return asr_pipe(
+def transcribe(ref_audio, language=None, model_name: str = asr_model_name, return_timestamps=False):
+    pipe = get_asr_pipeline(model_name, device=device)
+    result = pipe(
         ref_audio,
         chunk_length_s=30,
         batch_size=128,
         generate_kwargs={"task": "transcribe", "language": language} if language else {"task": "transcribe"},
-        return_timestamps=False,
-    )["text"].strip()
+        return_timestamps=return_timestamps,
+    )
+    if return_timestamps:
+        return result
+    return result["text"].strip()
 
 
 # load model checkpoint for inference
 
 
+# int8 dynamic quantization for cpu serving
+# only the linears inside the transformer blocks are quantized, input/text/time embeddings,
+# the output projection, the mel front-end and the vocoder stay float
+
+quantization = "int8_dynamic"
+
+
+def get_quantizable_linears(model):
+    return [
+        name
+        for name, module in model.transformer.named_modules()
+        if isinstance(module, torch.nn.Linear) and name.startswith(("transformer_blocks.", "layers."))
+    ]
+
+
+def quantize_model(model):
+    if model.device.type != "cpu":
+        raise ValueError("int8 dynamic quantization runs on cpu only, load the model with device='cpu'")
+    from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic
+
+    qconfig_spec = {name: default_dynamic_qconfig for name in get_quantizable_linears(model)}
+    quantize_dynamic(model.transformer.float(), qconfig_spec, dtype=torch.qint8, inplace=True)
+    model.quantization = quantization
+    return model
+
+
+def save_quantized_checkpoint(model, ckpt_path):
+    # plain .pt with the quantized state dict, load_checkpoint recognizes it by the "quantization" key
+    if getattr(model, "quantization", None) != quantization:
+        raise ValueError("Model is not quantized, run quantize_model first")
+    torch.save(dict(quantization=quantization, model_state_dict=model.state_dict()), ckpt_path)
+
+
 def load_checkpoint(model, ckpt_path, device: str, dtype=None, use_ema=True):
     if dtype is None:
         dtype = (
@@ -191,7 +279,10 @@ def load_checkpoint(model, ckpt_path, device: str, dtype=None, use_ema=True):
     else:
         checkpoint = torch.load(ckpt_path, map_location=device, weights_only=True)
 
-    if use_ema:
+    if checkpoint.get("quantization") == quantization:  # from save_quantized_checkpoint
+        model = quantize_model(model.to(torch.float32))
+        model.load_state_dict(checkpoint["model_state_dict"])
+    elif use_ema:
         if ckpt_type == "safetensors":
             checkpoint = {"ema_model_state_dict": checkpoint}
         checkpoint["model_state_dict"] = {
@@ -217,6 +308,24 @@ def load_checkpoint(model, ckpt_path, device: str, dtype=None, use_ema=True):
     return model.to(device)
 
 
+# precision policy: dtype of the transformer weights and ODE state, and autocast dtype around sampling
+# the mel front-end and the vocoder always run in fp32
+
+
+def get_precision_policy(precision=precision, device=device, mel_spec_type=mel_spec_type):
+    if precision == "auto":
+        # None lets load_checkpoint pick fp16 on capable cuda devices and fp32 otherwise
+        return (torch.float32 if mel_spec_type == "bigvgan" else None), None
+    elif precision == "fp32":
+        return torch.float32, None
+    elif precision == "fp16":
+        return torch.float16, None
+    elif precision == "bf16":
+        # on cpu, autocast keeps the ops that have no bf16 kernel working and casts mixed inputs
+        return torch.bfloat16, (torch.bfloat16 if "cpu" in str(device) else None)
+    raise ValueError(f"Unknown precision {precision}, choose from auto, fp32, fp16, bf16")
+
+
 # load model for inference
 
 
@@ -229,6 +338,8 @@ def load_model(
     ode_method=ode_method,
     use_ema=True,
     device=device,
+    precision=precision,
+    quantize=False,
 ):
     if vocab_file == "":
         vocab_file = str(files("f5_tts").joinpath("infer/examples/vocab.txt"))
@@ -255,8 +366,12 @@ def load_model(
         vocab_char_map=vocab_char_map,
     ).to(device)
 
-    dtype = torch.float32 if mel_spec_type == "bigvgan" else None
+    dtype, autocast_dtype = get_precision_policy(precision, device, mel_spec_type)
     model = load_checkpoint(model, ckpt_path, device, dtype=dtype, use_ema=use_ema)
+    model.autocast_dtype = autocast_dtype
+
+    if quantize and getattr(model, "quantization", None) != quantization:
+        model = quantize_model(model)
 
     return model
 
@@ -351,6 +466,175 @@ def preprocess_ref_audio_text(ref_audio_orig, ref_text, clip_short=True, show_in
     return ref_audio, ref_text
 
 
+# prepared reference voice prompts
+# the trimmed 24khz wave, cond mel, rms and ref_text are cached on disk keyed by a hash of the audio content,
+# so a reused voice skips decoding, silence clipping, asr, resampling and mel extraction
+
+
+class VoicePromptCache:
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024**2):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "f5_tts_voice_prompts")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, audio_bytes, ref_text, **params):
+        hasher = hashlib.sha256(audio_bytes)
+        hasher.update(ref_text.encode("utf-8"))
+        hasher.update(repr(sorted(params.items())).encode("utf-8"))
+        return hasher.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pt")
+
+    def get(self, key):
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            prompt = torch.load(path, map_location="cpu", weights_only=True)
+        except Exception:  # e.g. partially written by a killed process, or evicted since the lookup
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except FileNotFoundError:  # evicted by another thread or process meanwhile, a miss after all
+            return None
+        return prompt
+
+    def put(self, key, prompt):
+        path = self.path(key)
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+            torch.save(prompt, f)
+        os.replace(f.name, path)
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".pt"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:  # removed by another process since the listing
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+voice_prompt_cache = None
+
+
+def get_voice_prompt_cache():
+    global voice_prompt_cache
+    if voice_prompt_cache is None:
+        voice_prompt_cache = VoicePromptCache()
+    return voice_prompt_cache
+
+
+def prepare_voice_prompt(
+    ref_audio_orig,
+    ref_text,
+    model_obj,
+    mel_spec_type=mel_spec_type,
+    target_rms=target_rms,
+    clip_short=True,
+    show_info=print,
+    device=device,
+    cache=None,
+):
+    cache = cache or get_voice_prompt_cache()
+    with open(ref_audio_orig, "rb") as f:
+        audio_bytes = f.read()
+    key = cache.key(audio_bytes, ref_text, clip_short=clip_short, mel_spec_type=mel_spec_type, target_rms=target_rms)
+
+    prompt = cache.get(key)
+    if prompt is not None:
+        show_info("Using cached voice prompt...")
+        return prompt
+
+    ref_audio, ref_text = preprocess_ref_audio_text(ref_audio_orig, ref_text, clip_short, show_info, device)
+    audio, sr = torchaudio.load(ref_audio)
+    os.remove(ref_audio)
+
+    if audio.shape[0] > 1:
+        audio = torch.mean(audio, dim=0, keepdim=True)
+    rms = torch.sqrt(torch.mean(torch.square(audio))).item()
+    if rms < target_rms:
+        audio = audio * target_rms / rms
+    if sr != target_sample_rate:
+        resampler = torchaudio.transforms.Resample(sr, target_sample_rate)
+        audio = resampler(audio)
+
+    with torch.inference_mode():
+        mel = model_obj.mel_spec(audio.to(model_obj.device)).permute(0, 2, 1).cpu()
+
+    prompt = dict(
+        audio=audio,  # 1 nw, mono 24khz, rms normalized
+        mel=mel,  # 1 n d, cond mel
+        rms=rms,
+        ref_text=ref_text,
+        ref_text_len=len(ref_text.encode("utf-8")),
+    )
+    cache.put(key, prompt)
+    return prompt
+
+
+# compiled inference: transformer blocks compiled with torch.compile, sequence padded to static buckets
+# compiling happens lazily per bucket (and batch size), warm_up_model does it ahead of serving
+
+
+def compile_model(model_obj, buckets=seq_len_buckets, batch_sizes=(1,), **compile_kwargs):
+    # each bucket and batch size is its own graph, make room for all of them (x2 for the fused cfg batch)
+    # in dynamo's cache, past the limit dynamo silently falls back to eager
+    graphs = len(buckets) * len(batch_sizes) * 2
+    torch._dynamo.config.cache_size_limit = max(torch._dynamo.config.cache_size_limit, graphs)
+    if hasattr(torch._dynamo.config, "accumulated_cache_size_limit"):
+        limit = torch._dynamo.config.accumulated_cache_size_limit
+        torch._dynamo.config.accumulated_cache_size_limit = max(limit, graphs)
+    model_obj.compile_for_inference(buckets, **compile_kwargs)
+    return model_obj
+
+
+def warm_up_model(
+    model_obj,
+    vocoder,
+    mel_spec_type=mel_spec_type,
+    batch_sizes=(1,),
+    nfe_step=2,
+    fused_cfg=False,
+    device=device,
+    show_info=print,
+):
+    # runs one short sampling per bucket and batch size, or a single one when the model is not compiled
+    # pass the batch sizes and fused_cfg the model will be served with, any other shape compiles on first use
+    buckets = model_obj.seq_len_buckets or [512]
+    cond = torch.zeros(1, 128, n_mel_channels, device=device)
+    for batch in batch_sizes:
+        for bucket in buckets:
+            start = time.perf_counter()
+            with torch.inference_mode():
+                generated, _ = model_obj.sample(
+                    cond=cond.repeat(batch, 1, 1),
+                    text=["warm up"] * batch,
+                    duration=bucket - 1,  # any duration in the bucket runs the same (masked) graph
+                    steps=nfe_step,
+                    cfg_strength=cfg_strength,
+                    fused_cfg=fused_cfg,
+                    keep_trajectory=False,
+                )
+                vocode_windowed(generated.to(torch.float32).permute(0, 2, 1), vocoder, mel_spec_type)
+            show_info(f"Warmed up batch {batch} x {bucket} frames in {time.perf_counter() - start:.2f}s")
+
+
 # infer process: chunk text -> infer batches [i.e. infer_batch_process()]
 
 
@@ -365,15 +649,28 @@ def infer_process(
     progress=tqdm,
     target_rms=target_rms,
     cross_fade_duration=cross_fade_duration,
+    fade_shape=fade_shape,
     nfe_step=nfe_step,
     cfg_strength=cfg_strength,
     sway_sampling_coef=sway_sampling_coef,
     speed=speed,
     fix_duration=fix_duration,
     device=device,
+    chunk_segments=None,
+    batch_size=1,
+    fused_cfg=False,
+    ode_solver=None,
+    nfe_preset=None,
+    duration_buckets=None,
+    vocoder_window_frames=vocoder_window_frames,
+    bucket_stats=None,
 ):
     # Split the input text into batches
-    audio, sr = torchaudio.load(ref_audio)
+    if isinstance(ref_audio, dict):  # prepared voice prompt, see prepare_voice_prompt()
+        audio, sr = ref_audio["audio"], target_sample_rate
+    else:
+        audio, sr = torchaudio.load(ref_audio)
+        ref_audio = (audio, sr)
     max_chars = int(len(ref_text.encode("utf-8")) / (audio.shape[-1] / sr) * (25 - audio.shape[-1] / sr))
     gen_text_batches = chunk_text(gen_text, max_chars=max_chars)
     for i, gen_text in enumerate(gen_text_batches):
@@ -382,7 +679,7 @@ def infer_process(
 
     show_info(f"Generating audio in {len(gen_text_batches)} batches...")
     return infer_batch_process(
-        (audio, sr),
+        ref_audio,
         ref_text,
         gen_text_batches,
         model_obj,
@@ -391,16 +688,141 @@ def infer_process(
         progress=progress,
         target_rms=target_rms,
         cross_fade_duration=cross_fade_duration,
+        fade_shape=fade_shape,
         nfe_step=nfe_step,
         cfg_strength=cfg_strength,
         sway_sampling_coef=sway_sampling_coef,
         speed=speed,
         fix_duration=fix_duration,
         device=device,
+        chunk_segments=chunk_segments,
+        batch_size=batch_size,
+        fused_cfg=fused_cfg,
+        ode_solver=ode_solver,
+        nfe_preset=nfe_preset,
+        duration_buckets=duration_buckets,
+        vocoder_window_frames=vocoder_window_frames,
+        bucket_stats=bucket_stats,
     )
 
 
+# duration bucket usage, accumulated in a dict passed as bucket_stats: calls per bucket, used and padded frames
+
+
+def record_bucket_use(stats, bucket, used_frames, batch):
+    if stats is None:
+        return
+    calls = stats.setdefault("calls", {})
+    calls[bucket] = calls.get(bucket, 0) + 1
+    stats["used_frames"] = stats.get("used_frames", 0) + used_frames
+    stats["padded_frames"] = stats.get("padded_frames", 0) + bucket * batch
+
+
+def format_bucket_stats(stats):
+    calls = ", ".join(f"{bucket}x{count}" for bucket, count in sorted(stats["calls"].items()))
+    used, padded = stats["used_frames"], stats["padded_frames"]
+    return f"Duration buckets {calls}, occupancy {used / padded:.1%}, padding waste {padded - used} frames"
+
+
+# chunk stitching: fade curves are cached per length and shape, chunks are written into one float32 buffer
+
+
+@lru_cache(maxsize=32)
+def fade_curves(length, fade_shape="linear"):
+    t = np.linspace(0, 1, length, dtype=np.float32)
+    if fade_shape == "linear":
+        fade_in = t
+    elif fade_shape == "equal_power":
+        fade_in = np.sin(t * np.float32(np.pi / 2))
+    else:
+        raise ValueError(f"Unknown fade shape {fade_shape}, choose from linear, equal_power")
+    fade_out = np.ascontiguousarray(fade_in[::-1])
+    fade_in.flags.writeable = False
+    fade_out.flags.writeable = False
+    return fade_out, fade_in
+
+
+def stitch_waves(waves, cross_fade_duration=cross_fade_duration, fade_shape="linear"):
+    # returns the stitched float32 wave and the start sample of each chunk in it
+    cross_fade_samples = int(cross_fade_duration * target_sample_rate) if cross_fade_duration > 0 else 0
+
+    # lay out the chunks first, so the output is allocated once
+    starts, overlaps, total = [], [], 0
+    for wave in waves:
+        overlap = min(cross_fade_samples, total, len(wave))
+        starts.append(total - overlap)
+        overlaps.append(overlap)
+        total = total - overlap + len(wave)
+
+    final_wave = np.empty(total, dtype=np.float32)
+    for wave, start, overlap in zip(waves, starts, overlaps):
+        if overlap > 0:
+            fade_out, fade_in = fade_curves(overlap, fade_shape)
+            final_wave[start : start + overlap] *= fade_out
+            final_wave[start : start + overlap] += wave[:overlap] * fade_in
+        final_wave[start + overlap : start + len(wave)] = wave[overlap:]
+    return final_wave, starts
+
+
+# vocoder decode in overlapping windows of mel frames, so peak memory is bounded by the window, not the chunk
+# the edges of each window are dropped and the middle of the overlap is cross-faded, pieces are final when yielded
+
+
+def vocode(mel, vocoder, mel_spec_type=mel_spec_type):
+    with torch.inference_mode():
+        if mel_spec_type == "vocos":
+            return vocoder.decode(mel)
+        elif mel_spec_type == "bigvgan":
+            return vocoder(mel).squeeze(1)
+    raise ValueError(f"Unknown vocoder {mel_spec_type}, choose from vocos, bigvgan")
+
+
+def vocode_stream(
+    mel,
+    vocoder,
+    mel_spec_type=mel_spec_type,
+    window_frames=vocoder_window_frames,
+    overlap_frames=vocoder_overlap_frames,
+):
+    # mel is b d n, yields consecutive b nw wave pieces that add up to n * hop_length samples
+    total_frames = mel.shape[-1]
+    if not window_frames or total_frames <= window_frames:
+        yield vocode(mel, vocoder, mel_spec_type)
+        return
+
+    overlap = overlap_frames * hop_length
+    margin = overlap // 4
+    fade_out, fade_in = (torch.tensor(curve, device=mel.device) for curve in fade_curves(overlap - 2 * margin))
+
+    tail = None
+    for start in range(0, total_frames - overlap_frames, window_frames - overlap_frames):
+        wave = vocode(mel[..., start : start + window_frames], vocoder, mel_spec_type)
+        if tail is not None:
+            with torch.inference_mode():
+                wave[..., :margin] = tail[..., :margin]
+                wave[..., margin : overlap - margin] *= fade_in
+                wave[..., margin : overlap - margin] += tail[..., margin : overlap - margin] * fade_out
+        if start + window_frames >= total_frames:
+            yield wave
+            return
+        yield wave[..., :-overlap]
+        tail = wave[..., -overlap:]
+
+
+def vocode_windowed(
+    mel,
+    vocoder,
+    mel_spec_type=mel_spec_type,
+    window_frames=vocoder_window_frames,
+    overlap_frames=vocoder_overlap_frames,
+):
+    pieces = list(vocode_stream(mel, vocoder, mel_spec_type, window_frames, overlap_frames))
+    return pieces[0] if len(pieces) == 1 else torch.cat(pieces, dim=-1)
+
+
 # infer batches
+# if chunk_segments is a list, it is filled with the (text, start, end) seconds of each chunk in the final wave
+# if bucket_stats is a dict, duration bucket usage is added to it (see record_bucket_use)
 
 
 def infer_batch_process(
@@ -413,107 +835,140 @@ def infer_batch_process(
     progress=tqdm,
     target_rms=0.1,
     cross_fade_duration=0.15,
+    fade_shape="linear",
     nfe_step=32,
     cfg_strength=2.0,
     sway_sampling_coef=-1,
     speed=1,
     fix_duration=None,
     device=None,
+    chunk_segments=None,
+    batch_size=1,
+    fused_cfg=False,
+    ode_solver=None,
+    nfe_preset=None,
+    duration_buckets=None,
+    vocoder_window_frames=vocoder_window_frames,
+    bucket_stats=None,
 ):
-    audio, sr = ref_audio
-    if audio.shape[0] > 1:
-        audio = torch.mean(audio, dim=0, keepdim=True)
-
-    rms = torch.sqrt(torch.mean(torch.square(audio)))
-    if rms < target_rms:
-        audio = audio * target_rms / rms
-    if sr != target_sample_rate:
-        resampler = torchaudio.transforms.Resample(sr, target_sample_rate)
-        audio = resampler(audio)
-    audio = audio.to(device)
+    if nfe_preset is not None:  # fewer-step preset overrides solver, steps and schedule
+        ode_solver, nfe_step, sway_sampling_coef = get_nfe_preset(nfe_preset)
 
-    generated_waves = []
-    spectrograms = []
+    if isinstance(ref_audio, dict):  # prepared voice prompt, already normalized, resampled and maybe mel encoded
+        audio = ref_audio["audio"].to(device)
+        rms = ref_audio["rms"]
+        cond = ref_audio["mel"].to(device) if ref_audio.get("mel") is not None else audio
+    else:
+        audio, sr = ref_audio
+        if audio.shape[0] > 1:
+            audio = torch.mean(audio, dim=0, keepdim=True)
+
+        rms = torch.sqrt(torch.mean(torch.square(audio)))
+        if rms < target_rms:
+            audio = audio * target_rms / rms
+        if sr != target_sample_rate:
+            resampler = torchaudio.transforms.Resample(sr, target_sample_rate)
+            audio = resampler(audio)
+        audio = audio.to(device)
+        cond = audio
 
     if len(ref_text[-1].encode("utf-8")) == 1:
         ref_text = ref_text + " "
-    for i, gen_text in enumerate(progress.tqdm(gen_text_batches)):
-        # Prepare the text
-        text_list = [ref_text + gen_text]
-        final_text_list = convert_char_to_pinyin(text_list)
 
-        ref_audio_len = audio.shape[-1] // hop_length
+    ref_audio_len = audio.shape[-1] // hop_length
+    ref_text_len = len(ref_text.encode("utf-8"))
+
+    # Calculate duration of each chunk
+    durations = []
+    for gen_text in gen_text_batches:
         if fix_duration is not None:
-            duration = int(fix_duration * target_sample_rate / hop_length)
+            durations.append(int(fix_duration * target_sample_rate / hop_length))
         else:
-            # Calculate duration
-            ref_text_len = len(ref_text.encode("utf-8"))
             gen_text_len = len(gen_text.encode("utf-8"))
-            duration = ref_audio_len + int(ref_audio_len / ref_text_len * gen_text_len / speed)
+            durations.append(ref_audio_len + int(ref_audio_len / ref_text_len * gen_text_len / speed))
+
+    # Group chunks of similar duration so each group is one padded sample() call, batch_size=1 keeps text order
+    if batch_size > 1:
+        order = sorted(range(len(gen_text_batches)), key=lambda i: durations[i])
+    else:
+        order = list(range(len(gen_text_batches)))
+    groups = [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+
+    generated_waves = [None] * len(gen_text_batches)
+    spectrograms = [None] * len(gen_text_batches)
+
+    # Static shapes: total durations are rounded up to a bucket, padding is masked and trimmed after vocoding
+    buckets = sorted(duration_buckets or model_obj.seq_len_buckets or [])
+
+    for group in progress.tqdm(groups):
+        # Prepare the text
+        text_list = [ref_text + gen_text_batches[i] for i in group]
+        final_text_list = convert_char_to_pinyin(text_list)
+
+        if len(group) == 1:
+            duration = durations[group[0]]
+        else:
+            duration = torch.tensor([durations[i] for i in group], dtype=torch.long, device=audio.device)
 
         # inference
         with torch.inference_mode():
             generated, _ = model_obj.sample(
-                cond=audio,
+                cond=cond.repeat(len(group), *([1] * (cond.ndim - 1))),
                 text=final_text_list,
                 duration=duration,
                 steps=nfe_step,
                 cfg_strength=cfg_strength,
                 sway_sampling_coef=sway_sampling_coef,
+                fused_cfg=fused_cfg,
+                solver=ode_solver,
+                keep_trajectory=False,
+                seq_len_buckets=buckets or None,
             )
 
             generated = generated.to(torch.float32)
             generated = generated[:, ref_audio_len:, :]
             generated_mel_spec = generated.permute(0, 2, 1)
-            if mel_spec_type == "vocos":
-                generated_wave = vocoder.decode(generated_mel_spec)
-            elif mel_spec_type == "bigvgan":
-                generated_wave = vocoder(generated_mel_spec)
+
+            if len(group) == 1:
+                frame_lens = [generated_mel_spec.shape[-1]]
+            else:
+                # Frames past a chunk's own duration are padding, set them to the log-mel floor (silence)
+                # so they don't bleed into the chunk through the vocoder's receptive field
+                frame_lens = [max(min(durations[i], max_duration) - ref_audio_len, 1) for i in group]
+                frame_mask = lens_to_mask(
+                    torch.tensor(frame_lens, device=generated_mel_spec.device), length=generated_mel_spec.shape[-1]
+                )
+                generated_mel_spec = generated_mel_spec.masked_fill(~frame_mask[:, None, :], math.log(1e-5))
+
+            if buckets:
+                # Vocoder input padded to the same bucket, with silence
+                total_frames = ref_audio_len + generated_mel_spec.shape[-1]
+                bucket = next((b for b in buckets if b >= total_frames), total_frames)
+                generated_mel_spec = torch.nn.functional.pad(
+                    generated_mel_spec, (0, bucket - total_frames), value=math.log(1e-5)
+                )
+                record_bucket_use(bucket_stats, bucket, sum(ref_audio_len + n for n in frame_lens), len(group))
+
+            # Batched vocoder calls for the whole group, window by window
+            generated_wave = vocode_windowed(
+                generated_mel_spec, vocoder, mel_spec_type, window_frames=vocoder_window_frames
+            )
             if rms < target_rms:
                 generated_wave = generated_wave * rms / target_rms
 
-            # wav -> numpy
-            generated_wave = generated_wave.squeeze().cpu().numpy()
-
-            generated_waves.append(generated_wave)
-            spectrograms.append(generated_mel_spec[0].cpu().numpy())
+            # wav -> numpy, split back per chunk
+            generated_wave = generated_wave.cpu().numpy()
+            wave_lens = [min(n * hop_length, generated_wave.shape[-1]) for n in frame_lens]
+            for j, i in enumerate(group):
+                generated_waves[i] = generated_wave[j, : wave_lens[j]]
+                spectrograms[i] = generated_mel_spec[j, :, : frame_lens[j]].cpu().numpy()
 
     # Combine all generated waves with cross-fading
-    if cross_fade_duration <= 0:
-        # Simply concatenate
-        final_wave = np.concatenate(generated_waves)
-    else:
-        final_wave = generated_waves[0]
-        for i in range(1, len(generated_waves)):
-            prev_wave = final_wave
-            next_wave = generated_waves[i]
-
-            # Calculate cross-fade samples, ensuring it does not exceed wave lengths
-            cross_fade_samples = int(cross_fade_duration * target_sample_rate)
-            cross_fade_samples = min(cross_fade_samples, len(prev_wave), len(next_wave))
-
-            if cross_fade_samples <= 0:
-                # No overlap possible, concatenate
-                final_wave = np.concatenate([prev_wave, next_wave])
-                continue
-
-            # Overlapping parts
-            prev_overlap = prev_wave[-cross_fade_samples:]
-            next_overlap = next_wave[:cross_fade_samples]
-
-            # Fade out and fade in
-            fade_out = np.linspace(1, 0, cross_fade_samples)
-            fade_in = np.linspace(0, 1, cross_fade_samples)
-
-            # Cross-faded overlap
-            cross_faded_overlap = prev_overlap * fade_out + next_overlap * fade_in
-
-            # Combine
-            new_wave = np.concatenate(
-                [prev_wave[:-cross_fade_samples], cross_faded_overlap, next_wave[cross_fade_samples:]]
-            )
+    final_wave, chunk_starts = stitch_waves(generated_waves, cross_fade_duration, fade_shape)
 
-            final_wave = new_wave
+    if chunk_segments is not None:
+        for gen_text, start, wave in zip(gen_text_batches, chunk_starts, generated_waves):
+            chunk_segments.append((gen_text, start / target_sample_rate, (start + len(wave)) / target_sample_rate))
 
     # Create a combined spectrogram
     combined_spectrogram = np.concatenate(spectrograms, axis=1)
@@ -521,6 +976,118 @@ def infer_batch_process(
     return final_wave, target_sample_rate, combined_spectrogram
 
 
+# streamed chunk stitching: the cross-fade tail of a chunk is held back until the next chunk arrives to be
+# blended with, each chunk is an iterable of wave pieces (see vocode_stream), so it is passed on while it is still
+# being vocoded
+
+
+def cross_fade_pieces(chunks, cross_fade_duration=cross_fade_duration, fade_shape="linear"):
+    cross_fade_samples = int(cross_fade_duration * target_sample_rate) if cross_fade_duration > 0 else 0
+    tail = np.zeros(0, dtype=np.float32)
+    for pieces in chunks:
+        pending, chunk_len, blended = tail[:0], 0, len(tail) == 0
+        for piece in pieces:
+            piece = piece.astype(np.float32, copy=False)
+            pending = np.concatenate([pending, piece]) if len(pending) else piece
+            chunk_len += len(piece)
+            if not blended and chunk_len >= len(tail):
+                pending, blended = blend_tail(tail, pending, fade_shape), True
+            if blended and len(pending) > cross_fade_samples:
+                yield pending[: len(pending) - cross_fade_samples]
+                pending = pending[len(pending) - cross_fade_samples :]
+        if not blended:  # chunk shorter than the previous tail
+            pending = blend_tail(tail, pending, fade_shape)
+
+        keep = min(cross_fade_samples, chunk_len)
+        if len(pending) > keep:
+            yield pending[: len(pending) - keep]
+        tail = pending[len(pending) - keep :]
+
+    if len(tail) > 0:
+        yield tail
+
+
+def blend_tail(tail, wave, fade_shape="linear"):
+    # cross-fades the end of tail into the start of wave, the part of tail before the overlap is kept as is
+    overlap = min(len(tail), len(wave))
+    fade_out, fade_in = fade_curves(overlap, fade_shape)
+    wave = wave.copy()
+    wave[:overlap] *= fade_in
+    wave[:overlap] += tail[len(tail) - overlap :] * fade_out
+    return np.concatenate([tail[: len(tail) - overlap], wave])
+
+
+# infer a group of chunks that may each use a different voice prompt (see prepare_voice_prompt)
+# prompts are padded to one cond batch and the whole group is one sample() call
+# returns the per-chunk mels (1 d n), each caller vocodes its own chunks, e.g. with vocode_stream
+# duration_buckets as in infer_batch_process
+
+
+def voice_prompt_text(prompt):
+    ref_text = prompt["ref_text"]
+    if len(ref_text[-1].encode("utf-8")) == 1:
+        ref_text = ref_text + " "
+    return ref_text
+
+
+def chunk_duration(prompt, gen_text, speed=speed):
+    # total frames (reference + generated) for one chunk, same estimate as infer_batch_process
+    ref_audio_len = prompt["audio"].shape[-1] // hop_length
+    ref_text_len = len(voice_prompt_text(prompt).encode("utf-8"))
+    return ref_audio_len + int(ref_audio_len / ref_text_len * len(gen_text.encode("utf-8")) / speed)
+
+
+def infer_chunk_group(
+    prompts,
+    gen_texts,
+    model_obj,
+    nfe_step=nfe_step,
+    cfg_strength=cfg_strength,
+    sway_sampling_coef=sway_sampling_coef,
+    speed=speed,
+    device=device,
+    fused_cfg=False,
+    ode_solver=None,
+    nfe_preset=None,
+    duration_buckets=None,
+):
+    if nfe_preset is not None:
+        ode_solver, nfe_step, sway_sampling_coef = get_nfe_preset(nfe_preset)
+
+    ref_audio_lens = [prompt["audio"].shape[-1] // hop_length for prompt in prompts]
+    durations = [min(chunk_duration(p, t, speed), max_duration) for p, t in zip(prompts, gen_texts)]
+    text_list = [voice_prompt_text(p) + t for p, t in zip(prompts, gen_texts)]
+
+    cond = pad_sequence([prompt["mel"][0] for prompt in prompts], batch_first=True).to(device)
+    lens = torch.tensor([prompt["mel"].shape[1] for prompt in prompts], dtype=torch.long, device=device)
+
+    with torch.inference_mode():
+        generated, _ = model_obj.sample(
+            cond=cond,
+            text=convert_char_to_pinyin(text_list),
+            duration=torch.tensor(durations, dtype=torch.long, device=device),
+            lens=lens,
+            steps=nfe_step,
+            cfg_strength=cfg_strength,
+            sway_sampling_coef=sway_sampling_coef,
+            fused_cfg=fused_cfg,
+            solver=ode_solver,
+            keep_trajectory=False,
+            seq_len_buckets=duration_buckets,
+        )
+        generated = generated.to(torch.float32)
+
+        # cut each chunk's own generated frames out of the padded batch, pad with the log-mel floor (silence)
+        frame_lens = [max(dur - ref_len, 1) for dur, ref_len in zip(durations, ref_audio_lens)]
+        generated_mel_spec = pad_sequence(
+            [generated[j, ref_len:dur] for j, (ref_len, dur) in enumerate(zip(ref_audio_lens, durations))],
+            batch_first=True,
+            padding_value=math.log(1e-5),
+        ).permute(0, 2, 1)
+
+    return [generated_mel_spec[j : j + 1, :, : frame_lens[j]] for j in range(len(prompts))]
+
+
 # remove silence from generated wav
 
 
@@ -50,7 +50,9 @@ class TextEmbedding(nn.Module):
         batch, text_len = text.shape[0], text.shape[1]
         text = F.pad(text, (0, seq_len - text_len), value=0)
 
-        if drop_text:  # cfg for text
+        if isinstance(drop_text, torch.Tensor):  # per-sample cfg for text, e.g. fused cond & uncond batch
+            text = text.masked_fill(drop_text[:, None], 0)
+        elif drop_text:  # cfg for text
             text = torch.zeros_like(text)
 
         text = self.text_embed(text)  # b n -> b n d
@@ -79,7 +81,9 @@ class InputEmbedding(nn.Module):
         self.conv_pos_embed = ConvPositionEmbedding(dim=out_dim)
 
     def forward(self, x: float["b n d"], cond: float["b n d"], text_embed: float["b n d"], drop_audio_cond=False):  # noqa: F722
-        if drop_audio_cond:  # cfg for cond audio
+        if isinstance(drop_audio_cond, torch.Tensor):  # per-sample cfg for cond audio
+            cond = cond.masked_fill(drop_audio_cond[:, None, None], 0.0)
+        elif drop_audio_cond:  # cfg for cond audio
             cond = torch.zeros_like(cond)
 
         x = self.proj(torch.cat((x, cond, text_embed), dim=-1))
@@ -116,6 +120,9 @@ class DiT(nn.Module):
         self.input_embed = InputEmbedding(mel_dim, text_dim, dim)
 
         self.rotary_embed = RotaryEmbedding(dim_head)
+        # rope for every audio position up to max_duration, computed once and sliced per call
+        rope_freqs, self.rope_scale = self.rotary_embed.forward_from_seq_len(4096)
+        self.register_buffer("rope_freqs", rope_freqs, persistent=False)
 
         self.dim = dim
         self.depth = depth
@@ -129,6 +136,32 @@ class DiT(nn.Module):
         self.proj_out = nn.Linear(dim, mel_dim)
 
         self.checkpoint_activations = checkpoint_activations
+        self.compiled_blocks = None
+
+    # time step invariant parts, text embed (per drop_text variant), cached in a dict owned by one sampling call
+
+    def get_text_embed(self, text, seq_len, drop_text, cache=None):
+        if cache is None:
+            return self.text_embed(text, seq_len, drop_text=drop_text)
+        key = "per_sample" if isinstance(drop_text, torch.Tensor) else bool(drop_text)
+        if key not in cache:
+            cache[key] = self.text_embed(text, seq_len, drop_text=drop_text)
+        return cache[key]
+
+    def get_rope(self, seq_len):
+        if seq_len > self.rope_freqs.shape[1]:  # longer than the precomputed table
+            return self.rotary_embed.forward_from_seq_len(seq_len)
+        return self.rope_freqs[:, :seq_len], self.rope_scale
+
+    # compiled inference path, the block stack is one graph per input shape, so callers pad to a few lengths
+
+    def forward_blocks(self, x, t, mask, rope):
+        for block in self.transformer_blocks:
+            x = block(x, t, mask=mask, rope=rope)
+        return x
+
+    def compile_blocks(self, **compile_kwargs):
+        self.compiled_blocks = torch.compile(self.forward_blocks, dynamic=False, **compile_kwargs)
 
     def ckpt_wrapper(self, module):
         # https://github.com/chuanyangjin/fast-DiT/blob/main/models.py
@@ -144,9 +177,10 @@ class DiT(nn.Module):
         cond: float["b n d"],  # masked cond audio  # noqa: F722
         text: int["b nt"],  # text  # noqa: F722
         time: float["b"] | float[""],  # time step  # noqa: F821 F722
-        drop_audio_cond,  # cfg for cond audio
-        drop_text,  # cfg for text
+        drop_audio_cond,  # cfg for cond audio, bool or bool["b"] per sample
+        drop_text,  # cfg for text, bool or bool["b"] per sample
         mask: bool["b n"] | None = None,  # noqa: F722
+        cache=None,  # dict to reuse text embed across ode steps, one per sampling call
     ):
         batch, seq_len = x.shape[0], x.shape[1]
         if time.ndim == 0:
@@ -154,19 +188,22 @@ class DiT(nn.Module):
 
         # t: conditioning time, c: context (text + masked cond audio), x: noised input audio
         t = self.time_embed(time)
-        text_embed = self.text_embed(text, seq_len, drop_text=drop_text)
+        text_embed = self.get_text_embed(text, seq_len, drop_text, cache=cache)
         x = self.input_embed(x, cond, text_embed, drop_audio_cond=drop_audio_cond)
 
-        rope = self.rotary_embed.forward_from_seq_len(seq_len)
+        rope = self.get_rope(seq_len)
 
         if self.long_skip_connection is not None:
             residual = x
 
-        for block in self.transformer_blocks:
-            if self.checkpoint_activations:
-                x = torch.utils.checkpoint.checkpoint(self.ckpt_wrapper(block), x, t, mask, rope)
-            else:
-                x = block(x, t, mask=mask, rope=rope)
+        if self.compiled_blocks is not None and not self.training:
+            x = self.compiled_blocks(x, t, mask, rope)
+        else:
+            for block in self.transformer_blocks:
+                if self.checkpoint_activations:
+                    x = torch.utils.checkpoint.checkpoint(self.ckpt_wrapper(block), x, t, mask, rope)
+                else:
+                    x = block(x, t, mask=mask, rope=rope)
 
         if self.long_skip_connection is not None:
             x = self.long_skip_connection(torch.cat((x, residual), dim=-1))
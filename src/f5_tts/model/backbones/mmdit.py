@@ -37,7 +37,9 @@ class TextEmbedding(nn.Module):
 
     def forward(self, text: int["b nt"], drop_text=False) -> int["b nt d"]:  # noqa: F722
         text = text + 1
-        if drop_text:
+        if isinstance(drop_text, torch.Tensor):  # per-sample cfg for text
+            text = text.masked_fill(drop_text[:, None], 0)
+        elif drop_text:
             text = torch.zeros_like(text)
         text = self.text_embed(text)
 
@@ -62,7 +64,9 @@ class AudioEmbedding(nn.Module):
         self.conv_pos_embed = ConvPositionEmbedding(out_dim)
 
     def forward(self, x: float["b n d"], cond: float["b n d"], drop_audio_cond=False):  # noqa: F722
-        if drop_audio_cond:
+        if isinstance(drop_audio_cond, torch.Tensor):  # per-sample cfg for cond audio
+            cond = cond.masked_fill(drop_audio_cond[:, None, None], 0.0)
+        elif drop_audio_cond:
             cond = torch.zeros_like(cond)
         x = torch.cat((x, cond), dim=-1)
         x = self.linear(x)
@@ -93,6 +97,9 @@ class MMDiT(nn.Module):
         self.audio_embed = AudioEmbedding(mel_dim, dim)
 
         self.rotary_embed = RotaryEmbedding(dim_head)
+        # rope for every audio position up to max_duration, computed once and sliced per call
+        rope_freqs, self.rope_scale = self.rotary_embed.forward_from_seq_len(4096)
+        self.register_buffer("rope_freqs", rope_freqs, persistent=False)
 
         self.dim = dim
         self.depth = depth
@@ -113,15 +120,31 @@ class MMDiT(nn.Module):
         self.norm_out = AdaLayerNormZero_Final(dim)  # final modulation
         self.proj_out = nn.Linear(dim, mel_dim)
 
+    # time step invariant parts, text embed (per drop_text variant), cached in a dict owned by one sampling call
+
+    def get_text_embed(self, text, drop_text, cache=None):
+        if cache is None:
+            return self.text_embed(text, drop_text=drop_text)
+        key = "per_sample" if isinstance(drop_text, torch.Tensor) else bool(drop_text)
+        if key not in cache:
+            cache[key] = self.text_embed(text, drop_text=drop_text)
+        return cache[key]
+
+    def get_rope(self, seq_len):
+        if seq_len > self.rope_freqs.shape[1]:  # longer than the precomputed table
+            return self.rotary_embed.forward_from_seq_len(seq_len)
+        return self.rope_freqs[:, :seq_len], self.rope_scale
+
     def forward(
         self,
         x: float["b n d"],  # nosied input audio  # noqa: F722
         cond: float["b n d"],  # masked cond audio  # noqa: F722
         text: int["b nt"],  # text  # noqa: F722
         time: float["b"] | float[""],  # time step  # noqa: F821 F722
-        drop_audio_cond,  # cfg for cond audio
-        drop_text,  # cfg for text
+        drop_audio_cond,  # cfg for cond audio, bool or bool["b"] per sample
+        drop_text,  # cfg for text, bool or bool["b"] per sample
         mask: bool["b n"] | None = None,  # noqa: F722
+        cache=None,  # dict to reuse text embed across ode steps, one per sampling call
     ):
         batch = x.shape[0]
         if time.ndim == 0:
@@ -129,13 +152,13 @@ class MMDiT(nn.Module):
 
         # t: conditioning (time), c: context (text + masked cond audio), x: noised input audio
         t = self.time_embed(time)
-        c = self.text_embed(text, drop_text=drop_text)
+        c = self.get_text_embed(text, drop_text, cache=cache)
         x = self.audio_embed(x, cond, drop_audio_cond=drop_audio_cond)
 
         seq_len = x.shape[1]
         text_len = text.shape[1]
-        rope_audio = self.rotary_embed.forward_from_seq_len(seq_len)
-        rope_text = self.rotary_embed.forward_from_seq_len(text_len)
+        rope_audio = self.get_rope(seq_len)
+        rope_text = self.get_rope(text_len)
 
         for block in self.transformer_blocks:
             c, x = block(x, c, t, mask=mask, rope=rope_audio, c_rope=rope_text)
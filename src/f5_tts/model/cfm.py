@@ -9,6 +9,7 @@ d - dimension
 
 from __future__ import annotations
 
+from contextlib import nullcontext
 from random import random
 from typing import Callable
 
@@ -19,6 +20,7 @@ from torch.nn.utils.rnn import pad_sequence
 from torchdiffeq import odeint
 
 from f5_tts.model.modules import MelSpec
+from f5_tts.model.solvers import get_step_schedule, solve_ode, solvers
 from f5_tts.model.utils import (
     default,
     exists,
@@ -70,6 +72,8 @@ class CFM(nn.Module):
 
         # sampling related
         self.odeint_kwargs = odeint_kwargs
+        self.autocast_dtype = None  # set from the precision policy, autocast around the ODE solve
+        self.seq_len_buckets = None  # static sequence lengths to pad to, set by compile_for_inference
 
         # vocab map for tokenization
         self.vocab_char_map = vocab_char_map
@@ -78,6 +82,13 @@ class CFM(nn.Module):
     def device(self):
         return next(self.parameters()).device
 
+    def compile_for_inference(self, seq_len_buckets, **compile_kwargs):
+        # compiles the transformer blocks, sampling pads each call up to the next bucket so graphs are reused
+        if not hasattr(self.transformer, "compile_blocks"):
+            raise ValueError(f"{type(self.transformer).__name__} backbone has no compiled inference path")
+        self.seq_len_buckets = sorted(seq_len_buckets)
+        self.transformer.compile_blocks(**compile_kwargs)
+
     @torch.no_grad()
     def sample(
         self,
@@ -96,6 +107,10 @@ class CFM(nn.Module):
         duplicate_test=False,
         t_inter=0.1,
         edit_mask=None,
+        fused_cfg=False,
+        solver: str | None = None,
+        keep_trajectory=True,
+        seq_len_buckets: list[int] | None = None,
     ):
         self.eval()
         # raw wave
@@ -137,19 +152,25 @@ class CFM(nn.Module):
         duration = duration.clamp(max=max_duration)
         max_duration = duration.amax()
 
+        # static shapes: pad the sequence up to the next bucket (if any fits), the padding is masked out
+        seq_len_buckets = default(seq_len_buckets, self.seq_len_buckets)
+        seq_len = int(max_duration)
+        if exists(seq_len_buckets):
+            seq_len = next((bucket for bucket in sorted(seq_len_buckets) if bucket >= seq_len), seq_len)
+
         # duplicate test corner for inner time step oberservation
         if duplicate_test:
             test_cond = F.pad(cond, (0, 0, cond_seq_len, max_duration - 2 * cond_seq_len), value=0.0)
 
-        cond = F.pad(cond, (0, 0, 0, max_duration - cond_seq_len), value=0.0)
-        cond_mask = F.pad(cond_mask, (0, max_duration - cond_mask.shape[-1]), value=False)
+        cond = F.pad(cond, (0, 0, 0, seq_len - cond_seq_len), value=0.0)
+        cond_mask = F.pad(cond_mask, (0, seq_len - cond_mask.shape[-1]), value=False)
         cond_mask = cond_mask.unsqueeze(-1)
         step_cond = torch.where(
             cond_mask, cond, torch.zeros_like(cond)
         )  # allow direct control (cut cond audio) with lens passed in
 
-        if batch > 1:
-            mask = lens_to_mask(duration)
+        if batch > 1 or exists(seq_len_buckets):  # bucketed calls always mask, so one graph per shape
+            mask = lens_to_mask(duration, length=seq_len)
         else:  # save memory and speed up, as single inference need no mask currently
             mask = None
 
@@ -159,19 +180,56 @@ class CFM(nn.Module):
 
         # neural ode
 
+        # text embed doesn't depend on t or x, computed once for all steps of this call
+        text_embed_cache = {}
+
+        # fused cfg: cond and uncond passes stacked along batch and run as one transformer call
+        if fused_cfg and cfg_strength >= 1e-5:
+            cfg_cond = torch.cat((step_cond, step_cond), dim=0)
+            cfg_text = torch.cat((text, text), dim=0)
+            cfg_mask = torch.cat((mask, mask), dim=0) if exists(mask) else None
+            cfg_drop = torch.arange(2 * batch, device=device) >= batch  # False for cond half, True for uncond half
+
         def fn(t, x):
             # at each step, conditioning is fixed
             # step_cond = torch.where(cond_mask, cond, torch.zeros_like(cond))
 
+            if fused_cfg and cfg_strength >= 1e-5:
+                pred, null_pred = self.transformer(
+                    x=torch.cat((x, x), dim=0),
+                    cond=cfg_cond,
+                    text=cfg_text,
+                    time=t,
+                    mask=cfg_mask,
+                    drop_audio_cond=cfg_drop,
+                    drop_text=cfg_drop,
+                    cache=text_embed_cache,
+                ).chunk(2, dim=0)
+                return pred + (pred - null_pred) * cfg_strength
+
             # predict flow
             pred = self.transformer(
-                x=x, cond=step_cond, text=text, time=t, mask=mask, drop_audio_cond=False, drop_text=False
+                x=x,
+                cond=step_cond,
+                text=text,
+                time=t,
+                mask=mask,
+                drop_audio_cond=False,
+                drop_text=False,
+                cache=text_embed_cache,
             )
             if cfg_strength < 1e-5:
                 return pred
 
             null_pred = self.transformer(
-                x=x, cond=step_cond, text=text, time=t, mask=mask, drop_audio_cond=True, drop_text=True
+                x=x,
+                cond=step_cond,
+                text=text,
+                time=t,
+                mask=mask,
+                drop_audio_cond=True,
+                drop_text=True,
+                cache=text_embed_cache,
             )
             return pred + (pred - null_pred) * cfg_strength
 
@@ -182,7 +240,8 @@ class CFM(nn.Module):
         for dur in duration:
             if exists(seed):
                 torch.manual_seed(seed)
-            y0.append(torch.randn(dur, self.num_channels, device=self.device, dtype=step_cond.dtype))
+            # drawn in fp32 so a seed gives the same noise whatever the model precision
+            y0.append(torch.randn(dur, self.num_channels, device=self.device).to(step_cond.dtype))
         y0 = pad_sequence(y0, padding_value=0, batch_first=True)
 
         t_start = 0
@@ -193,15 +252,32 @@ class CFM(nn.Module):
             y0 = (1 - t_start) * y0 + t_start * test_cond
             steps = int(steps * (1 - t_start))
 
-        t = torch.linspace(t_start, 1, steps + 1, device=self.device, dtype=step_cond.dtype)
-        if sway_sampling_coef is not None:
-            t = t + sway_sampling_coef * (torch.cos(torch.pi / 2 * t) - 1 + t)
+        y0 = F.pad(y0, (0, 0, 0, seq_len - y0.shape[1]), value=0.0)
 
-        trajectory = odeint(fn, y0, t, **self.odeint_kwargs)
+        t = get_step_schedule(steps, sway_sampling_coef, t_start, device=self.device, dtype=step_cond.dtype)
+
+        autocast = (
+            torch.autocast(device_type=self.device.type, dtype=self.autocast_dtype)
+            if exists(self.autocast_dtype)
+            else nullcontext()
+        )
+        # lean mode holds only the current state, fixed-grid torchdiffeq methods have an in-house equivalent
+        if not keep_trajectory and not exists(solver) and self.odeint_kwargs.get("method") in solvers:
+            solver = self.odeint_kwargs["method"]
+
+        with autocast:
+            if exists(solver):  # in-house solver, see solvers.py
+                trajectory = solve_ode(solver, fn, y0, t, keep_trajectory=keep_trajectory)
+            else:
+                trajectory = odeint(fn, y0, t, **self.odeint_kwargs)
 
         sampled = trajectory[-1]
+        if not keep_trajectory:
+            trajectory = None
         out = sampled
-        out = torch.where(cond_mask, cond, out)
+        out = torch.where(cond_mask, cond, out)[:, :max_duration]
+        if exists(trajectory):
+            trajectory = trajectory[:, :, :max_duration]
 
         if exists(vocoder):
             out = out.permute(0, 2, 1)
@@ -17,6 +17,7 @@ import torch.nn.functional as F
 import torchaudio
 from librosa.filters import mel as librosa_mel_fn
 from torch import nn
+from torch.nn.utils.rnn import pad_sequence
 from x_transformers.x_transformers import apply_rotary_pos_emb
 
 
@@ -72,6 +73,35 @@ def get_bigvgan_mel_spectrogram(
     return mel_spec
 
 
+mel_stft_cache = {}
+
+
+def get_vocos_mel_stft(
+    n_fft=1024,
+    n_mel_channels=100,
+    target_sample_rate=24000,
+    hop_length=256,
+    win_length=1024,
+    device="cpu",
+):
+    key = f"{n_fft}_{n_mel_channels}_{target_sample_rate}_{hop_length}_{win_length}_{device}"
+
+    if key not in mel_stft_cache:
+        mel_stft_cache[key] = torchaudio.transforms.MelSpectrogram(
+            sample_rate=target_sample_rate,
+            n_fft=n_fft,
+            win_length=win_length,
+            hop_length=hop_length,
+            n_mels=n_mel_channels,
+            power=1,
+            center=True,
+            normalized=False,
+            norm=None,
+        ).to(device)
+
+    return mel_stft_cache[key]
+
+
 def get_vocos_mel_spectrogram(
     waveform,
     n_fft=1024,
@@ -79,18 +109,12 @@ def get_vocos_mel_spectrogram(
     target_sample_rate=24000,
     hop_length=256,
     win_length=1024,
+    mel_stft=None,
 ):
-    mel_stft = torchaudio.transforms.MelSpectrogram(
-        sample_rate=target_sample_rate,
-        n_fft=n_fft,
-        win_length=win_length,
-        hop_length=hop_length,
-        n_mels=n_mel_channels,
-        power=1,
-        center=True,
-        normalized=False,
-        norm=None,
-    ).to(waveform.device)
+    if mel_stft is None:
+        mel_stft = get_vocos_mel_stft(
+            n_fft, n_mel_channels, target_sample_rate, hop_length, win_length, device=waveform.device
+        )
     if len(waveform.shape) == 3:
         waveform = waveform.squeeze(1)  # 'b 1 nw -> b nw'
 
@@ -119,29 +143,52 @@ class MelSpec(nn.Module):
         self.win_length = win_length
         self.n_mel_channels = n_mel_channels
         self.target_sample_rate = target_sample_rate
+        self.mel_spec_type = mel_spec_type
 
         if mel_spec_type == "vocos":
             self.extractor = get_vocos_mel_spectrogram
         elif mel_spec_type == "bigvgan":
             self.extractor = get_bigvgan_mel_spectrogram
 
+        # vocos transform per device, kept out of submodules so it is not in state_dict nor cast by model.to(dtype)
+        self.mel_stfts = {}
+
         self.register_buffer("dummy", torch.tensor(0), persistent=False)
 
     def forward(self, wav):
         if self.dummy.device != wav.device:
             self.to(wav.device)
 
-        mel = self.extractor(
-            waveform=wav,
+        extractor_kwargs = dict(
             n_fft=self.n_fft,
             n_mel_channels=self.n_mel_channels,
             target_sample_rate=self.target_sample_rate,
             hop_length=self.hop_length,
             win_length=self.win_length,
         )
+        if self.mel_spec_type == "vocos":
+            if wav.device not in self.mel_stfts:
+                self.mel_stfts[wav.device] = get_vocos_mel_stft(**extractor_kwargs, device=wav.device)
+            extractor_kwargs["mel_stft"] = self.mel_stfts[wav.device]
+
+        mel = self.extractor(waveform=wav, **extractor_kwargs)
 
         return mel
 
+    def forward_batch(self, wavs: list[torch.Tensor]):
+        # list of 'nw' or 'c nw' waves -> padded 'b d n' mel and per item frame lengths, in one extractor call,
+        # multi-channel waves are downmixed to mono as in preprocessing
+        # frames at the very end of shorter items see zero padding instead of their own edge padding
+        wavs = [wav.mean(dim=0) if wav.ndim == 2 else wav for wav in wavs]
+        wav_lens = torch.tensor([wav.shape[-1] for wav in wavs], device=wavs[0].device)
+        mel = self(pad_sequence(wavs, batch_first=True))
+
+        if self.mel_spec_type == "vocos":  # centered stft
+            mel_lens = wav_lens // self.hop_length + 1
+        else:
+            mel_lens = wav_lens // self.hop_length
+        return mel, mel_lens.clamp(max=mel.shape[-1])
+
 
 # sinusoidal position embedding
 
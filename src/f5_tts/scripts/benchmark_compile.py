@@ -0,0 +1,74 @@
+# Benchmark the compiled inference path against eager, compile cost and steady-state sampling time
+# usage: python src/f5_tts/scripts/benchmark_compile.py --device cpu --durations 500 900 1400
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+import torch
+from cached_path import cached_path
+
+from f5_tts.infer.utils_infer import compile_model, load_model, n_mel_channels
+from f5_tts.model import DiT
+
+
+def run_sample(model, duration, nfe_step, device):
+    cond = torch.zeros(1, 200, n_mel_channels, device=device)
+    start = time.perf_counter()
+    with torch.inference_mode():
+        model.sample(
+            cond=cond,
+            text=["benchmark text for the compiled path"],
+            duration=duration,
+            steps=nfe_step,
+            cfg_strength=2.0,
+            sway_sampling_coef=-1.0,
+            keep_trajectory=False,
+        )
+    return time.perf_counter() - start
+
+
+def steady_state(model, duration, nfe_step, device, repeats):
+    return min(run_sample(model, duration, nfe_step, device) for _ in range(repeats))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--precision", default="fp32", choices=["auto", "fp32", "fp16", "bf16"])
+    parser.add_argument("--durations", default=[500, 900, 1400], type=int, nargs="+", help="Total frames per call")
+    parser.add_argument("--nfe_step", default=8, type=int)
+    parser.add_argument("--repeats", default=3, type=int)
+    args = parser.parse_args()
+
+    torch.set_num_threads(os.cpu_count())
+    model = load_model(
+        DiT,
+        dict(dim=1024, depth=22, heads=16, ff_mult=2, text_dim=512, conv_layers=4),
+        str(cached_path("hf://SWivid/F5-TTS/F5TTS_Base/model_1200000.safetensors")),
+        device=args.device,
+        precision=args.precision,
+    )
+
+    eager = {}
+    for duration in args.durations:
+        run_sample(model, duration, args.nfe_step, args.device)  # allocator warm-up
+        eager[duration] = steady_state(model, duration, args.nfe_step, args.device, args.repeats)
+
+    compile_model(model)
+    compiled, compile_cost = {}, {}
+    for duration in args.durations:
+        compile_cost[duration] = run_sample(model, duration, args.nfe_step, args.device)
+        compiled[duration] = steady_state(model, duration, args.nfe_step, args.device, args.repeats)
+
+    print(f"\n{args.device}, {args.precision}, {args.nfe_step} steps, {torch.get_num_threads()} threads")
+    print(f"{'frames':>8} {'bucket':>8} {'eager':>9} {'compiled':>9} {'speedup':>8} {'1st call':>9}")
+    for duration in args.durations:
+        bucket = next((b for b in model.seq_len_buckets if b >= duration), duration)
+        print(
+            f"{duration:>8} {bucket:>8} {eager[duration]:>8.2f}s {compiled[duration]:>8.2f}s "
+            f"{eager[duration] / compiled[duration]:>7.2f}x {compile_cost[duration]:>8.1f}s"
+        )
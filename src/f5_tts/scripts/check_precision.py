@@ -0,0 +1,65 @@
+# Compare a reduced precision policy against fp32 on the sample prompts in infer/examples
+# usage: python src/f5_tts/scripts/check_precision.py --precision bf16 --device cpu
+
+import argparse
+import os
+import sys
+import time
+from importlib.resources import files
+
+sys.path.append(os.getcwd())
+
+import numpy as np
+import torch
+
+from f5_tts.api import F5TTS
+
+
+prompts = [
+    dict(
+        ref_file=str(files("f5_tts").joinpath("infer/examples/basic/basic_ref_en.wav")),
+        ref_text="Some call me nature, others call me mother nature.",
+        gen_text="I don't really care what you call me. I've been a silent spectator, watching species evolve.",
+    ),
+    dict(
+        ref_file=str(files("f5_tts").joinpath("infer/examples/basic/basic_ref_zh.wav")),
+        ref_text="对，这就是我，万人敬仰的太乙真人。",
+        gen_text="突然，身边一阵笑声。我看着他们，意气风发地挺直了胸膛。",
+    ),
+]
+
+
+def run(precision, device, nfe_step, seed):
+    tts = F5TTS(device=device, precision=precision)
+    for prompt in prompts:  # untimed warm-up, also fills the voice prompt cache
+        tts.infer(**prompt, nfe_step=2, seed=seed, show_info=lambda *args: None)
+
+    outputs = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        wav, _, spect = tts.infer(**prompt, nfe_step=nfe_step, seed=seed, show_info=lambda *args: None)
+        outputs.append((wav, spect, time.perf_counter() - start))
+    del tts
+    torch.cuda.empty_cache()
+    return outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--precision", default="bf16", choices=["fp16", "bf16"])
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--nfe_step", default=16, type=int)
+    parser.add_argument("--seed", default=0, type=int)
+    args = parser.parse_args()
+
+    reference = run("fp32", args.device, args.nfe_step, args.seed)
+    candidate = run(args.precision, args.device, args.nfe_step, args.seed)
+
+    print(f"\n{args.precision} vs fp32 on {args.device}, nfe {args.nfe_step}, seed {args.seed}")
+    for prompt, (ref_wav, ref_spect, ref_time), (wav, spect, cand_time) in zip(prompts, reference, candidate):
+        mel_l1 = np.abs(spect - ref_spect).mean()
+        mel_cos = (spect * ref_spect).sum() / (np.linalg.norm(spect) * np.linalg.norm(ref_spect))
+        snr = 10 * np.log10(np.sum(ref_wav**2) / max(np.sum((wav - ref_wav) ** 2), 1e-12))
+        print(os.path.basename(prompt["ref_file"]))
+        print(f"  mel L1 {mel_l1:.4f}, mel cosine {mel_cos:.5f}, wave SNR {snr:.1f} dB")
+        print(f"  time fp32 {ref_time:.2f}s, {args.precision} {cand_time:.2f}s ({ref_time / cand_time:.2f}x)")
@@ -0,0 +1,48 @@
+# Export an int8 dynamically quantized checkpoint for cpu serving
+# usage: python src/f5_tts/scripts/quantize_model.py --output ckpts/F5TTS_Base/model_1200000_int8.pt
+# the output loads through load_model / load_checkpoint like any other checkpoint, on cpu
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from cached_path import cached_path
+
+from f5_tts.infer.utils_infer import load_model, save_quantized_checkpoint
+from f5_tts.model import DiT, UNetT
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--model", default="F5-TTS", choices=["F5-TTS", "E2-TTS"])
+    parser.add_argument("-p", "--ckpt_file", default="", help="Float checkpoint, default the released one")
+    parser.add_argument("-v", "--vocab_file", default="")
+    parser.add_argument("--vocoder_name", default="vocos", choices=["vocos", "bigvgan"])
+    parser.add_argument("-o", "--output", required=True, help="Path of the quantized .pt checkpoint")
+    args = parser.parse_args()
+
+    if args.model == "F5-TTS":
+        model_cls = DiT
+        model_cfg = dict(dim=1024, depth=22, heads=16, ff_mult=2, text_dim=512, conv_layers=4)
+        ckpt_file = args.ckpt_file or str(cached_path("hf://SWivid/F5-TTS/F5TTS_Base/model_1200000.safetensors"))
+    elif args.model == "E2-TTS":
+        model_cls = UNetT
+        model_cfg = dict(dim=1024, depth=24, heads=16, ff_mult=4)
+        ckpt_file = args.ckpt_file or str(cached_path("hf://SWivid/E2-TTS/E2TTS_Base/model_1200000.safetensors"))
+
+    model = load_model(
+        model_cls,
+        model_cfg,
+        ckpt_file,
+        mel_spec_type=args.vocoder_name,
+        vocab_file=args.vocab_file,
+        device="cpu",
+        precision="fp32",
+        quantize=True,
+    )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    save_quantized_checkpoint(model, args.output)
+    print(f"Saved int8 checkpoint to {args.output} ({os.path.getsize(args.output) / 2**20:.1f} MB)")
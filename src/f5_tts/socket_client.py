@@ -0,0 +1,75 @@
+import argparse
+import socket
+import time
+
+import numpy as np
+import soundfile as sf
+
+from f5_tts.socket_protocol import FRAME_AUDIO, FRAME_END, FRAME_ERROR, decode_audio, recv_frame, send_request
+
+
+def stream_tts(text, host="localhost", port=9998, audio_format="float32", voice="main"):
+    """Send one request to socket_server.py and yield float32 audio chunks as they arrive."""
+    with socket.create_connection((host, port)) as client_socket:
+        send_request(client_socket, text, audio_format, voice=voice)
+        while True:
+            frame = recv_frame(client_socket)
+            if frame is None:
+                raise ConnectionError("Server closed the connection before the end of audio")
+
+            frame_type, dtype_code, payload = frame
+            if frame_type == FRAME_AUDIO:
+                yield decode_audio(payload, dtype_code)
+            elif frame_type == FRAME_END:
+                return
+            elif frame_type == FRAME_ERROR:
+                raise RuntimeError(f"Server error: {payload.decode('utf-8')}")
+            else:
+                raise ValueError(f"Unexpected frame type {frame_type}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference client for the F5-TTS socket server")
+    parser.add_argument("text", help="Text to synthesize")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", default=9998, type=int)
+    parser.add_argument(
+        "--format",
+        default="float32",
+        choices=["float32", "float16", "int16"],
+        help="Sample format on the wire, float16 and int16 halve the bandwidth",
+    )
+    parser.add_argument("--voice", default="main", help="Name of a voice registered on the server")
+    parser.add_argument("--output", default="socket_output.wav", help="Path to save the received audio")
+    parser.add_argument("--play", action="store_true", help="Play the audio while it is received (needs pyaudio)")
+    args = parser.parse_args()
+
+    stream = None
+    if args.play:
+        import pyaudio
+
+        p = pyaudio.PyAudio()
+        stream = p.open(format=pyaudio.paFloat32, channels=1, rate=24000, output=True, frames_per_buffer=2048)
+
+    start = time.perf_counter()
+    chunks = []
+    try:
+        for audio_chunk in stream_tts(args.text, args.host, args.port, args.format, args.voice):
+            if not chunks:
+                print(f"First audio after {time.perf_counter() - start:.3f}s")
+            chunks.append(audio_chunk)
+            if stream is not None:
+                stream.write(audio_chunk.tobytes())
+    finally:
+        if stream is not None:
+            stream.stop_stream()
+            stream.close()
+            p.terminate()
+
+    audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    sf.write(args.output, audio, 24000)
+    print(f"Received {len(audio) / 24000:.2f}s of audio in {time.perf_counter() - start:.3f}s, saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
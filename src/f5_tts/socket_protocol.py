@@ -0,0 +1,134 @@
+# Length-prefixed framing shared by socket_server.py and socket_client.py
+#
+# every frame is a fixed 6-byte header followed by `length` bytes of payload:
+#     frame type (uint8) | payload dtype (uint8) | payload length (uint32, big-endian)
+# audio payloads are raw little-endian samples, sent straight from the numpy buffer
+# so no per-sample python objects are created on either side
+
+import asyncio
+import json
+import struct
+
+import numpy as np
+
+HEADER = struct.Struct("!BBI")
+
+# requests are small json, the server rejects longer frames before buffering them
+MAX_REQUEST_FRAME_BYTES = 1024**2
+
+# frame types
+FRAME_REQUEST = 1  # client -> server, utf-8 json, e.g. {"text": "...", "format": "int16"}
+FRAME_AUDIO = 2  # server -> client, audio samples
+FRAME_END = 3  # server -> client, all audio for the request has been sent
+FRAME_ERROR = 4  # server -> client, utf-8 error message
+
+# audio payload formats
+AUDIO_FORMATS = {
+    "float32": (0, np.dtype("<f4")),
+    "float16": (1, np.dtype("<f2")),
+    "int16": (2, np.dtype("<i2")),
+}
+AUDIO_DTYPES = {code: dtype for code, dtype in AUDIO_FORMATS.values()}
+
+
+class FrameTooLargeError(ValueError):
+    pass
+
+
+def recv_exact(sock, size):
+    # returns None if the peer closed the connection before sending anything
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            if received == 0:
+                return None
+            raise ConnectionError(f"Connection closed after {received} of {size} bytes")
+        received += n
+    return buffer
+
+
+def send_frame(sock, frame_type, payload=b"", dtype_code=0):
+    payload = memoryview(payload).cast("B")
+    sock.sendall(HEADER.pack(frame_type, dtype_code, payload.nbytes))
+    if payload.nbytes:
+        sock.sendall(payload)
+
+
+def recv_frame(sock, max_length=None):
+    # the payload length comes from the peer, with max_length set a longer frame raises before it is allocated
+    header = recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    frame_type, dtype_code, length = HEADER.unpack(header)
+    if max_length is not None and length > max_length:
+        raise FrameTooLargeError(f"Frame of {length} bytes exceeds the limit of {max_length} bytes")
+    payload = recv_exact(sock, length) if length else bytearray()
+    if payload is None:
+        raise ConnectionError("Connection closed before frame payload")
+    return frame_type, dtype_code, payload
+
+
+def encode_audio(audio, audio_format="float32"):
+    dtype_code, dtype = AUDIO_FORMATS[audio_format]
+    audio = np.asarray(audio, dtype=np.float32)
+    if dtype.kind == "i":
+        audio = np.clip(audio, -1.0, 1.0) * np.iinfo(dtype).max
+    return dtype_code, np.ascontiguousarray(audio, dtype=dtype)
+
+
+def decode_audio(payload, dtype_code):
+    dtype = AUDIO_DTYPES[dtype_code]
+    audio = np.frombuffer(payload, dtype=dtype)
+    if dtype.kind == "i":
+        return audio.astype(np.float32) / np.iinfo(dtype).max
+    return audio.astype(np.float32)
+
+
+def send_audio(sock, audio, audio_format="float32"):
+    dtype_code, samples = encode_audio(audio, audio_format)
+    send_frame(sock, FRAME_AUDIO, samples.view(np.uint8), dtype_code)
+
+
+def send_request(sock, text, audio_format="float32", **options):
+    send_frame(sock, FRAME_REQUEST, json.dumps(dict(text=text, format=audio_format, **options)).encode("utf-8"))
+
+
+def send_error(sock, message):
+    send_frame(sock, FRAME_ERROR, str(message).encode("utf-8"))
+
+
+# asyncio streams versions, for the asyncio server mode
+
+
+async def read_frame(reader, max_length=None):
+    # returns None if the peer closed the connection between frames, max_length as in recv_frame
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ConnectionError("Connection closed inside a frame header") from e
+    frame_type, dtype_code, length = HEADER.unpack(header)
+    if max_length is not None and length > max_length:
+        raise FrameTooLargeError(f"Frame of {length} bytes exceeds the limit of {max_length} bytes")
+    payload = await reader.readexactly(length) if length else b""
+    return frame_type, dtype_code, payload
+
+
+def write_frame(writer, frame_type, payload=b"", dtype_code=0):
+    payload = memoryview(payload).cast("B")
+    writer.write(HEADER.pack(frame_type, dtype_code, payload.nbytes))
+    if payload.nbytes:
+        writer.write(payload)
+
+
+def write_audio(writer, audio, audio_format="float32"):
+    dtype_code, samples = encode_audio(audio, audio_format)
+    write_frame(writer, FRAME_AUDIO, samples.view(np.uint8), dtype_code)
+
+
+def write_error(writer, message):
+    write_frame(writer, FRAME_ERROR, str(message).encode("utf-8"))
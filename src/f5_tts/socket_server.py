@@ -1,21 +1,297 @@
 import argparse
+import asyncio
 import gc
+import json
 import socket
-import struct
+import threading
+import time
+import tomli
 import torch
-import torchaudio
 import traceback
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 from importlib.resources import files
 from threading import Thread
 
 from cached_path import cached_path
 
-from infer.utils_infer import infer_batch_process, preprocess_ref_audio_text, load_vocoder, load_model
-from model.backbones.dit import DiT
+from f5_tts.infer.utils_infer import (
+    chunk_duration,
+    chunk_text,
+    compile_model,
+    cross_fade_pieces,
+    format_bucket_stats,
+    infer_chunk_group,
+    load_vocoder,
+    load_model,
+    max_duration,
+    prepare_voice_prompt,
+    record_bucket_use,
+    seq_len_buckets,
+    target_rms,
+    vocode_stream,
+    vocoder_window_frames,
+    warm_up_model,
+)
+from f5_tts.model.backbones.dit import DiT
+from f5_tts.socket_protocol import (
+    AUDIO_FORMATS,
+    FRAME_END,
+    FRAME_REQUEST,
+    MAX_REQUEST_FRAME_BYTES,
+    FrameTooLargeError,
+    read_frame,
+    recv_frame,
+    send_audio,
+    send_error,
+    send_frame,
+    write_audio,
+    write_error,
+    write_frame,
+)
+
+
+def padded_batch_sizes(max_batch_size):
+    # powers of two up to max_batch_size (and max_batch_size itself), the only batch sizes a compiled model sees
+    sizes = [1]
+    while sizes[-1] * 2 < max_batch_size:
+        sizes.append(sizes[-1] * 2)
+    if max_batch_size > 1:
+        sizes.append(max_batch_size)
+    return sizes
+
+
+class BatchScheduler:
+    """Collects chunk requests from all clients and runs them through the model in padded groups.
+
+    Pending chunks wait in one queue per client, bounded by `max_queue_per_client`, with at most `max_queue`
+    queued over all clients. The worker thread waits `batch_window` seconds for more requests to arrive, picks
+    up to `max_batch_size` chunks round-robin across clients, groups them by duration bucket and issues one
+    `infer_chunk_group` call per group. Buckets are `duration_buckets` (else the model's compiled buckets), each
+    call is padded to its bucket and the occupancy is tallied for `bucket_report`, without any, chunks are
+    grouped in `bucket_frames` wide ranges and not padded. With `batch_sizes` given (compiled models), each
+    group is padded up to the next of these sizes with copies of its last chunk, so only those shapes are
+    compiled. Results go back through futures as mel spectrograms, the requests vocode them on their own threads
+    while the worker samples the next group.
+    """
+
+    def __init__(
+        self,
+        model,
+        device,
+        max_batch_size=8,
+        batch_window=0.02,
+        max_queue=64,
+        max_queue_per_client=8,
+        bucket_frames=256,
+        duration_buckets=None,
+        batch_sizes=None,
+        fused_cfg=True,
+    ):
+        self.model = model
+        self.device = device
+        self.fused_cfg = fused_cfg
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self.bucket_frames = bucket_frames
+        self.duration_buckets = sorted(duration_buckets or model.seq_len_buckets or [])
+        self.bucket_stats = {}  # see record_bucket_use
+        self.batch_sizes = sorted(batch_sizes) if batch_sizes else None
+
+        self.pending = OrderedDict()  # client id -> deque of jobs, order is the round-robin order
+        self.queued = 0
+        self.condition = threading.Condition()
+        self.worker = Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, client_id, prompt, gen_text, timeout=None):
+        """Queue one chunk, blocks while the client's or the global queue is full (backpressure).
+
+        Returns a future of its 1 d n mel.
+        """
+        future = Future()
+        job = (prompt, gen_text, chunk_duration(prompt, gen_text), future)
+
+        def has_room():
+            client_queued = len(self.pending.get(client_id, ()))
+            return self.queued < self.max_queue and client_queued < self.max_queue_per_client
+
+        with self.condition:
+            if not self.condition.wait_for(has_room, timeout):
+                raise TimeoutError("TTS request queue is full")
+            self.pending.setdefault(client_id, deque()).append(job)
+            self.queued += 1
+            self.condition.notify_all()
+        return future
+
+    def cancel(self, client_id):
+        """Drop the chunks a client still has queued, e.g. after it disconnected. Running groups finish."""
+        with self.condition:
+            queue = self.pending.pop(client_id, None) or ()
+            for job in queue:
+                job[3].cancel()
+            self.queued -= len(queue)
+            self.condition.notify_all()
+
+    def _take_jobs(self):
+        with self.condition:
+            self.condition.wait_for(lambda: self.queued > 0)
+
+            # give other clients a short window to join the batch
+            deadline = time.monotonic() + self.batch_window
+            while self.queued < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+            # round-robin over clients, one chunk per client per round
+            jobs = []
+            while self.pending and len(jobs) < self.max_batch_size:
+                client_id, queue = next(iter(self.pending.items()))
+                job = queue.popleft()
+                self.queued -= 1
+                if job[3].set_running_or_notify_cancel():
+                    jobs.append(job)
+                del self.pending[client_id]
+                if queue:
+                    self.pending[client_id] = queue  # back of the line
+            self.condition.notify_all()
+        return jobs
+
+    def _group_key(self, duration):
+        # chunks padded to the same length share a call
+        if self.duration_buckets:
+            return next((bucket for bucket in self.duration_buckets if bucket >= duration), duration)
+        return duration // self.bucket_frames
+
+    def bucket_report(self):
+        """Duration bucket occupancy since start, None without buckets or before the first call."""
+        with self.condition:
+            return format_bucket_stats(self.bucket_stats) if self.bucket_stats else None
+
+    def _run(self):
+        while True:
+            jobs = self._take_jobs()
+
+            groups = {}
+            for job in jobs:
+                groups.setdefault(self._group_key(job[2]), []).append(job)
+
+            for bucket, group in groups.items():
+                padded = group
+                if self.batch_sizes:
+                    size = next((size for size in self.batch_sizes if size >= len(group)), len(group))
+                    padded = group + [group[-1]] * (size - len(group))
+                try:
+                    mels = infer_chunk_group(
+                        [job[0] for job in padded],
+                        [job[1] for job in padded],
+                        self.model,
+                        device=self.device,
+                        fused_cfg=self.fused_cfg,
+                        duration_buckets=self.duration_buckets or None,
+                    )
+                except Exception as e:
+                    traceback.print_exc()
+                    for job in group:
+                        job[3].set_exception(e)
+                    continue
+                if self.duration_buckets:
+                    with self.condition:
+                        used_frames = sum(min(job[2], max_duration) for job in group)
+                        record_bucket_use(self.bucket_stats, bucket, used_frames, len(padded))
+                for job, mel in zip(group, mels):
+                    job[3].set_result(mel)
+
+
+class VoiceRegistry:
+    """Named voices served by one model, each preprocessed once into a voice prompt (mel, rms, text).
+
+    Voices are registered by name with their reference audio and text, and prepared on first use.
+    At most `max_loaded` prepared prompts are kept in memory, least recently used ones are evicted
+    and come back from the on-disk voice prompt cache when asked for again. A voice is prepared outside the
+    registry lock, requests for other voices carry on meanwhile and requests for the same one wait for it.
+    """
+
+    def __init__(self, model, device, max_loaded=8):
+        self.model = model
+        self.device = device
+        self.max_loaded = max_loaded
+        self.voices = {}  # name -> (ref_audio, ref_text)
+        self.loaded = OrderedDict()  # name -> prompt, in LRU order
+        self.loading = {}  # name -> future of the prompt being prepared
+        self.lock = threading.Lock()
+
+    def register(self, name, ref_audio, ref_text=""):
+        with self.lock:
+            self.voices[name] = (ref_audio, ref_text)
+            self.loaded.pop(name, None)
+
+    def names(self):
+        return list(self.voices)
+
+    def get(self, name):
+        with self.lock:
+            if name not in self.voices:
+                raise ValueError(f"Unknown voice {name}, choose from {self.names()}")
+            if name in self.loaded:
+                self.loaded.move_to_end(name)
+                return self.loaded[name]
+            if name in self.loading:  # another request is preparing it already
+                future = self.loading[name]
+                voice = None
+            else:
+                future = self.loading[name] = Future()
+                voice = self.voices[name]
+
+        if voice is None:
+            return future.result()
+
+        ref_audio, ref_text = voice
+        try:
+            print(f"Loading voice {name} from {ref_audio}")
+            prompt = prepare_voice_prompt(ref_audio, ref_text, self.model, device=self.device)
+            prompt = dict(prompt, mel=prompt["mel"].to(self.device))  # keep the cond mel on the model device
+        except BaseException as e:
+            with self.lock:
+                del self.loading[name]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            del self.loading[name]
+            if self.voices.get(name) == voice:  # not re-registered meanwhile
+                self.loaded[name] = prompt
+                while len(self.loaded) > self.max_loaded:
+                    evicted, _ = self.loaded.popitem(last=False)
+                    print(f"Evicted voice {evicted}")
+        future.set_result(prompt)
+        return prompt
 
 
 class TTSStreamingProcessor:
-    def __init__(self, ckpt_file, vocab_file, ref_audio, ref_text, device=None, dtype=torch.float32):
+    def __init__(
+        self,
+        ckpt_file,
+        vocab_file,
+        ref_audio,
+        ref_text,
+        device=None,
+        precision="auto",
+        max_batch_size=8,
+        batch_window=0.02,
+        max_queue=64,
+        max_queue_per_client=8,
+        voices=None,
+        max_loaded_voices=8,
+        use_compile=False,
+        vocoder_window_frames=vocoder_window_frames,
+        fused_cfg=True,
+        duration_buckets=None,
+    ):
         self.device = device or (
             "cuda" if torch.cuda.is_available() else "mps" if torch.backends.mps.is_available() else "cpu"
         )
@@ -30,93 +306,160 @@ class TTSStreamingProcessor:
             ode_method="euler",
             use_ema=True,
             device=self.device,
-        ).to(self.device, dtype=dtype)
+            precision=precision,
+        )
 
         # Load the vocoder
         self.vocoder = load_vocoder(is_local=False)
 
         # Set sampling rate for streaming
         self.sampling_rate = 24000  # Consistency with client
-
-        # Set reference audio and text
-        self.ref_audio = ref_audio
-        self.ref_text = ref_text
-
-        # Warm up the model
-        self._warm_up()
-
-    def _warm_up(self):
-        """Warm up the model with a dummy input to ensure it's ready for real-time processing."""
+        self.vocoder_window_frames = vocoder_window_frames
+
+        # Register the reference audio and text as the "main" voice, next to any extra voices
+        self.voices = VoiceRegistry(self.model, self.device, max_loaded=max_loaded_voices)
+        self.voices.register("main", ref_audio, ref_text)
+        for name, voice in (voices or {}).items():
+            self.voices.register(name, voice["ref_audio"], voice.get("ref_text", ""))
+
+        # Compile the transformer blocks for static sequence buckets, the warm-up then precompiles every bucket,
+        # batches are padded to a few sizes so the graphs stay few
+        batch_sizes = padded_batch_sizes(max_batch_size) if use_compile else None
+        if use_compile:
+            compile_model(self.model, buckets=duration_buckets or seq_len_buckets, batch_sizes=batch_sizes)
+
+        # Warm up the model and prepare the default voice before the first request,
+        # when compiled every batch size the scheduler pads to is compiled here rather than on a request
         print("Warming up the model...")
-        ref_audio, ref_text = preprocess_ref_audio_text(self.ref_audio, self.ref_text)
-        audio, sr = torchaudio.load(ref_audio)
-        gen_text = "Warm-up text for the model."
-
-        # Pass the vocoder as an argument here
-        infer_batch_process((audio, sr), ref_text, [gen_text], self.model, self.vocoder, device=self.device)
+        warm_up_model(
+            self.model,
+            self.vocoder,
+            batch_sizes=batch_sizes or (1,),
+            fused_cfg=fused_cfg,
+            device=self.device,
+        )
+        self.voices.get("main")
         print("Warm-up completed.")
 
-    def generate_stream(self, text, play_steps_in_s=0.5):
-        """Generate audio in chunks and yield them in real-time."""
-        # Preprocess the reference audio and text
-        ref_audio, ref_text = preprocess_ref_audio_text(self.ref_audio, self.ref_text)
-
-        # Load reference audio
-        audio, sr = torchaudio.load(ref_audio)
-
-        # Run inference for the input text
-        audio_chunk, final_sample_rate, _ = infer_batch_process(
-            (audio, sr),
-            ref_text,
-            [text],
+        # All model calls go through the scheduler from here on
+        self.scheduler = BatchScheduler(
             self.model,
-            self.vocoder,
-            device=self.device,  # Pass vocoder here
+            self.device,
+            max_batch_size=max_batch_size,
+            batch_window=batch_window,
+            max_queue=max_queue,
+            max_queue_per_client=max_queue_per_client,
+            duration_buckets=duration_buckets,
+            batch_sizes=batch_sizes,
+            fused_cfg=fused_cfg,
         )
 
-        # Break the generated audio into chunks and send them
-        chunk_size = int(final_sample_rate * play_steps_in_s)
+    def generate_stream(self, text, client_id=None, lookahead=2, voice="main"):
+        """Generate audio chunk by chunk in the given voice and yield each one as soon as it is synthesized.
 
-        if len(audio_chunk) < chunk_size:
-            packed_audio = struct.pack(f"{len(audio_chunk)}f", *audio_chunk)
-            yield packed_audio
-            return
+        Only `lookahead` chunks of a request are queued at a time, so a long text can't crowd out other clients.
+        """
+        request_start = time.perf_counter()
+        client_id = client_id if client_id is not None else threading.get_ident()
 
-        for i in range(0, len(audio_chunk), chunk_size):
-            chunk = audio_chunk[i : i + chunk_size]
+        # Preprocessed voice prompt, chunks of different voices can still share one batched model call
+        prompt = self.voices.get(voice)
 
-            # Check if it's the final chunk
-            if i + chunk_size >= len(audio_chunk):
-                chunk = audio_chunk[i:]
+        # Split the text the same way infer_process does, so each chunk can be streamed on its own
+        ref_audio_seconds = prompt["audio"].shape[-1] / self.sampling_rate
+        max_chars = int(prompt["ref_text_len"] / ref_audio_seconds * (25 - ref_audio_seconds))
+        gen_text_batches = chunk_text(text, max_chars=max_chars)
 
-            # Send the chunk if it is not empty
-            if len(chunk) > 0:
-                packed_audio = struct.pack(f"{len(chunk)}f", *chunk)
-                yield packed_audio
+        def generate_chunks():
+            futures = deque()
+            try:
+                for gen_text in gen_text_batches:
+                    futures.append(self.scheduler.submit(client_id, prompt, gen_text))
+                    if len(futures) >= lookahead:
+                        yield self.vocode_chunk(futures.popleft().result(), prompt)
+                while futures:
+                    yield self.vocode_chunk(futures.popleft().result(), prompt)
+            finally:
+                # stream closed early (client gone or error), don't synthesize chunks nobody will receive
+                for future in futures:
+                    future.cancel()
+
+        chunks = generate_chunks()
+        first_audio = True
+        try:
+            for audio_chunk in cross_fade_pieces(chunks):
+                if first_audio:
+                    first_audio = False
+                    print(
+                        f"First audio after {time.perf_counter() - request_start:.3f}s ({len(gen_text_batches)} chunks)"
+                    )
+
+                yield audio_chunk
+        finally:
+            chunks.close()
+
+        print(f"Request done after {time.perf_counter() - request_start:.3f}s")
+        bucket_report = self.scheduler.bucket_report()
+        if bucket_report:
+            print(f"Since start: {bucket_report}")
+
+    def vocode_chunk(self, mel, prompt):
+        """Vocode one sampled chunk window by window, yielding each piece of wave as soon as it is decoded."""
+        for wave in vocode_stream(mel, self.vocoder, window_frames=self.vocoder_window_frames):
+            wave = wave[0].cpu().numpy()
+            if prompt["rms"] < target_rms:
+                wave = wave * prompt["rms"] / target_rms
+            yield wave
+
+
+def parse_request(frame, voices):
+    frame_type, _, payload = frame
+    if frame_type != FRAME_REQUEST:
+        raise ValueError(f"Unexpected frame type {frame_type}")
+    request = json.loads(payload.decode("utf-8"))
+    request["text"] = request["text"].strip()
+    request.setdefault("format", "float32")
+    request.setdefault("voice", "main")
+    if request["voice"] not in voices.names():
+        raise ValueError(f"Unknown voice {request['voice']}, choose from {voices.names()}")
+    if request["format"] not in AUDIO_FORMATS:
+        raise ValueError(f"Unsupported audio format {request['format']}, choose from {list(AUDIO_FORMATS)}")
+    return request
 
 
 def handle_client(client_socket, processor):
     try:
         while True:
-            # Receive data from the client
-            data = client_socket.recv(1024).decode("utf-8")
-            if not data:
+            # Receive a request frame from the client
+            try:
+                frame = recv_frame(client_socket, max_length=MAX_REQUEST_FRAME_BYTES)
+            except FrameTooLargeError as frame_e:
+                print(f"Bad request: {frame_e}")
+                send_error(client_socket, frame_e)  # the payload is unread, the connection can't continue
+                break
+            if frame is None:
                 break
 
             try:
-                # The client sends the text input
-                text = data.strip()
+                request = parse_request(frame, processor.voices)
 
                 # Generate and stream audio chunks
-                for audio_chunk in processor.generate_stream(text):
-                    client_socket.sendall(audio_chunk)
+                for audio_chunk in processor.generate_stream(
+                    request["text"], client_id=id(client_socket), voice=request["voice"]
+                ):
+                    send_audio(client_socket, audio_chunk, request["format"])
+
+                # Send end-of-audio frame
+                send_frame(client_socket, FRAME_END)
 
-                # Send end-of-audio signal
-                client_socket.sendall(b"END_OF_AUDIO")
+            except (ValueError, KeyError) as request_e:
+                print(f"Bad request: {request_e}")
+                send_error(client_socket, request_e)
 
             except Exception as inner_e:
                 print(f"Error during processing: {inner_e}")
                 traceback.print_exc()  # Print the full traceback to diagnose the issue
+                send_error(client_socket, inner_e)
                 break
 
     except Exception as e:
@@ -139,11 +482,104 @@ def start_server(host, port, processor):
         client_handler.start()
 
 
+# asyncio mode: connections are coroutines, so idle clients cost no OS thread
+# only requests being synthesized hold a thread of the executor, blocked on the scheduler
+
+
+async def handle_client_async(reader, writer, processor, executor):
+    loop = asyncio.get_running_loop()
+    client_id = id(writer)
+
+    def client_gone():
+        return reader.at_eof() or writer.is_closing()
+
+    try:
+        while True:
+            try:
+                frame = await read_frame(reader, max_length=MAX_REQUEST_FRAME_BYTES)
+            except FrameTooLargeError as frame_e:
+                print(f"Bad request: {frame_e}")
+                write_error(writer, frame_e)  # the payload is unread, the connection can't continue
+                await writer.drain()
+                break
+            if frame is None:
+                break
+
+            try:
+                request = parse_request(frame, processor.voices)
+            except (ValueError, KeyError) as request_e:
+                print(f"Bad request: {request_e}")
+                write_error(writer, request_e)
+                await writer.drain()
+                continue
+
+            stream = processor.generate_stream(request["text"], client_id=client_id, voice=request["voice"])
+            try:
+                while True:
+                    next_chunk = loop.run_in_executor(executor, next, stream, None)
+                    # poll for a disconnect while the chunk is synthesized, so queued chunks can be dropped
+                    while not next_chunk.done():
+                        await asyncio.wait({next_chunk}, timeout=0.1)
+                        if client_gone():
+                            raise ConnectionResetError("Client disconnected mid-utterance")
+                    audio_chunk = next_chunk.result()
+                    if audio_chunk is None:
+                        break
+                    write_audio(writer, audio_chunk, request["format"])
+                    await writer.drain()
+
+                write_frame(writer, FRAME_END)
+                await writer.drain()
+
+            except (ConnectionError, CancelledError, asyncio.CancelledError):
+                print(f"Cancelling request of disconnected client {writer.get_extra_info('peername')}")
+                processor.scheduler.cancel(client_id)
+                # let the executor thread unwind before closing the generator it is running, it may have
+                # submitted another chunk meanwhile, so cancel again once it is done
+                await asyncio.gather(next_chunk, return_exceptions=True)
+                stream.close()
+                processor.scheduler.cancel(client_id)
+                break
+
+            except Exception as inner_e:
+                print(f"Error during processing: {inner_e}")
+                traceback.print_exc()
+                write_error(writer, inner_e)
+                await writer.drain()
+                break
+
+    except Exception as e:
+        print(f"Error handling client: {e}")
+        traceback.print_exc()
+    finally:
+        writer.close()
+
+
+async def start_async_server(host, port, processor, max_active_requests=64):
+    executor = ThreadPoolExecutor(max_workers=max_active_requests, thread_name_prefix="tts-request")
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_client_async(reader, writer, processor, executor), host, port
+    )
+    print(f"Server listening on {host}:{port} (asyncio)")
+
+    async with server:
+        await server.serve_forever()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
 
     parser.add_argument("--host", default="0.0.0.0")
-    parser.add_argument("--port", default=9998)
+    parser.add_argument("--port", default=9998, type=int)
+    parser.add_argument(
+        "--mode",
+        default="threaded",
+        choices=["threaded", "asyncio"],
+        help="Thread per connection, or asyncio connections with a thread only per active request",
+    )
+    parser.add_argument(
+        "--max_active_requests", default=64, type=int, help="Max requests synthesized at once in asyncio mode"
+    )
 
     parser.add_argument(
         "--ckpt_file",
@@ -166,12 +602,59 @@ if __name__ == "__main__":
         default="",
         help="Reference audio subtitle, leave empty to auto-transcribe",
     )
+    parser.add_argument(
+        "--voices_config",
+        default=None,
+        help="TOML file with extra [voices.<name>] tables (ref_audio, ref_text), picked per request by name",
+    )
+    parser.add_argument("--max_loaded_voices", default=8, type=int, help="Max preprocessed voices kept in memory")
 
     parser.add_argument("--device", default=None, help="Device to run the model on")
-    parser.add_argument("--dtype", default=torch.float32, help="Data type to use for model inference")
+    parser.add_argument(
+        "--precision",
+        default="auto",
+        choices=["auto", "fp32", "fp16", "bf16"],
+        help="Precision of the model weights and ODE state, bf16 autocasts on cpu, vocoder stays fp32",
+    )
+
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="torch.compile the transformer blocks with static sequence buckets, precompiled at start",
+    )
+
+    parser.add_argument("--max_batch_size", default=8, type=int, help="Max chunks per batched model call")
+    parser.add_argument(
+        "--batch_window", default=0.02, type=float, help="Seconds to wait for other requests to join a batch"
+    )
+    parser.add_argument("--max_queue", default=64, type=int, help="Max queued chunks before requests block")
+    parser.add_argument(
+        "--max_queue_per_client", default=8, type=int, help="Max queued chunks of one client before it blocks"
+    )
+    parser.add_argument(
+        "--duration_buckets",
+        type=int,
+        nargs="+",
+        help="Pad chunk durations (frames) up to these buckets and batch chunks of one bucket, with --compile "
+        "these are the compiled buckets, e.g. 512 1024 2048 4096",
+    )
+    parser.add_argument(
+        "--vocoder_window",
+        default=vocoder_window_frames,
+        type=int,
+        help="Mel frames per streamed vocoder call, overlapping windows are cross-faded, 0 vocodes whole chunks",
+    )
 
     args = parser.parse_args()
 
+    voices = {}
+    if args.voices_config:
+        with open(args.voices_config, "rb") as f:
+            voices = tomli.load(f).get("voices", {})
+    for voice in voices.values():
+        if "infer/examples/" in voice["ref_audio"]:
+            voice["ref_audio"] = str(files("f5_tts").joinpath(voice["ref_audio"]))
+
     try:
         # Initialize the processor with the model and vocoder
         processor = TTSStreamingProcessor(
@@ -180,11 +663,23 @@ if __name__ == "__main__":
             ref_audio=args.ref_audio,
             ref_text=args.ref_text,
             device=args.device,
-            dtype=args.dtype,
+            precision=args.precision,
+            max_batch_size=args.max_batch_size,
+            batch_window=args.batch_window,
+            max_queue=args.max_queue,
+            max_queue_per_client=args.max_queue_per_client,
+            voices=voices,
+            max_loaded_voices=args.max_loaded_voices,
+            use_compile=args.compile,
+            vocoder_window_frames=args.vocoder_window,
+            duration_buckets=args.duration_buckets,
         )
 
         # Start the server
-        start_server(args.host, args.port, processor)
+        if args.mode == "asyncio":
+            asyncio.run(start_async_server(args.host, args.port, processor, args.max_active_requests))
+        else:
+            start_server(args.host, args.port, processor)
 
     except KeyboardInterrupt:
         gc.collect()
@@ -0,0 +1,102 @@
+from artifact_store import file_digest
+
+ASR_MODELS = {
+    "tiny": "openai/whisper-tiny",
+    "base": "openai/whisper-base",
+    "small": "openai/whisper-small",
+    "medium": "openai/whisper-medium",
+    "large-v3": "openai/whisper-large-v3",
+    "large-v3-turbo": "openai/whisper-large-v3-turbo",
+}
+DEFAULT_ASR_MODEL = "large-v3-turbo"
+
+
+def format_timestamp(seconds):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+
+
+def write_srt(segments, srt_path):
+    with open(srt_path, "w", encoding="utf-8") as srt_file:
+        for i, segment in enumerate(segments):
+            srt_file.write(f"{i + 1}\n")
+            srt_file.write(f"{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}\n")
+            srt_file.write(f"{segment['text']}\n\n")
+    return srt_path
+
+
+def align_segments(chunk_segments, max_words=6):
+    # Subtitles from the TTS chunk timings (text, start, end), no ASR needed since the text is known.
+    # Word times are spread over each chunk proportionally to their length, punctuation counting as a pause.
+    segments = []
+    for text, start, end in chunk_segments:
+        words = text.split()
+        if not words:
+            continue
+        weights = [len(word) + 1 + (3 if word[-1] in ",;:.!?" else 0) for word in words]
+        seconds_per_weight = (end - start) / sum(weights)
+
+        line, line_start, cursor = [], start, start
+        for word, weight in zip(words, weights):
+            if not line:
+                line_start = cursor
+            line.append(word)
+            cursor += weight * seconds_per_weight
+            if len(line) >= max_words or word[-1] in ".!?":
+                segments.append({"start": line_start, "end": cursor, "text": " ".join(line)})
+                line = []
+        if line:
+            segments.append({"start": line_start, "end": end, "text": " ".join(line)})
+
+    # Chunks overlap by the cross-fade, so don't let a line run into the next one
+    for prev, next_ in zip(segments, segments[1:]):
+        prev["end"] = min(prev["end"], next_["start"])
+    return segments
+
+
+def make_srt(srt_path, audio_path, chunk_segments=None, model_size=DEFAULT_ASR_MODEL, artifact_store=None):
+    # Subtitles from the TTS chunk timings when known, otherwise with the ASR model,
+    # cached by the audio content and whatever the segments come from
+    def produce(path):
+        if chunk_segments:
+            segments = align_segments(chunk_segments)
+        else:
+            segments = transcribe_segments(audio_path, model_size)
+        write_srt(segments, path)
+
+    if artifact_store is None:
+        produce(srt_path)
+        return srt_path
+
+    if chunk_segments:
+        source = {"chunk_segments": chunk_segments}
+    else:
+        source = {"asr_model": ASR_MODELS.get(model_size, model_size)}
+    key = artifact_store.key("subtitles", audio=file_digest(audio_path), **source)
+    artifact_store.cached(key, ".srt", srt_path, produce)
+    return srt_path
+
+
+def transcribe_segments(audio_path, model_size=DEFAULT_ASR_MODEL, language=None):
+    # Goes through the shared ASR registry in utils_infer, so the model stays loaded across renders
+    # and is the same copy used to transcribe reference audio
+    import soundfile as sf
+    from f5_tts.infer.utils_infer import transcribe
+
+    model_name = ASR_MODELS.get(model_size, model_size)
+    result = transcribe(audio_path, language, model_name=model_name, return_timestamps=True)
+
+    audio_duration = sf.info(audio_path).duration
+    segments = []
+    for chunk in result["chunks"]:
+        start, end = chunk["timestamp"]
+        text = chunk["text"].strip()
+        if not text:
+            continue
+        start = start or 0.0
+        end = audio_duration if end is None else min(end, audio_duration)
+        segments.append({"start": start, "end": max(start, end), "text": text})
+    return segments
@@ -0,0 +1,42 @@
+import asyncio
+import socket
+
+import pytest
+
+from f5_tts.socket_protocol import (
+    FRAME_REQUEST,
+    HEADER,
+    MAX_REQUEST_FRAME_BYTES,
+    FrameTooLargeError,
+    read_frame,
+    recv_frame,
+    send_request,
+)
+
+
+def test_recv_frame_rejects_oversized_header():
+    server, client = socket.socketpair()
+    with server, client:
+        # only the 6-byte header is sent, the limit has to trip before the payload is awaited or allocated
+        client.sendall(HEADER.pack(FRAME_REQUEST, 0, 2**32 - 1))
+        with pytest.raises(FrameTooLargeError):
+            recv_frame(server, max_length=MAX_REQUEST_FRAME_BYTES)
+
+
+def test_recv_frame_accepts_request_within_limit():
+    server, client = socket.socketpair()
+    with server, client:
+        send_request(client, "Hello world", audio_format="int16")
+        frame_type, _, payload = recv_frame(server, max_length=MAX_REQUEST_FRAME_BYTES)
+        assert frame_type == FRAME_REQUEST
+        assert b"Hello world" in payload
+
+
+def test_read_frame_rejects_oversized_header():
+    async def read_oversized():
+        reader = asyncio.StreamReader()
+        reader.feed_data(HEADER.pack(FRAME_REQUEST, 0, 2**32 - 1))
+        return await read_frame(reader, max_length=MAX_REQUEST_FRAME_BYTES)
+
+    with pytest.raises(FrameTooLargeError):
+        asyncio.run(read_oversized())
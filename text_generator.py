@@ -0,0 +1,38 @@
+import google.generativeai as genai
+from google.generativeai.types import HarmBlockThreshold, HarmCategory
+
+GEMINI_MODELS = [
+    "gemini-pro",
+    "gemini-flash",
+    "gemini-1.5-pro",
+    "gemini-1.5-flash",
+    "gemini-1.5-pro-002",
+    "gemini-1.5-flash-002",
+    "gemini-2.0-flash-exp",
+    "gemini-1.5-flash-8b",
+]
+DEFAULT_GEMINI_MODEL = "gemini-1.5-flash"
+
+SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+}
+
+
+class PromptBlockedError(Exception):
+    pass
+
+
+def configure_gemini(api_key):
+    genai.configure(api_key=api_key)
+
+
+def generate_script(prompt, model_name=DEFAULT_GEMINI_MODEL, safety_settings=SAFETY_SETTINGS):
+    # Shared by the UI and the batch runner, configure_gemini() has to be called once before
+    model = genai.GenerativeModel(model_name, safety_settings=safety_settings)
+    response = model.generate_content(prompt)
+    if response.prompt_feedback.block_reason:
+        raise PromptBlockedError("Sorry, the prompt was blocked due to safety concerns.")
+    return response.text
@@ -0,0 +1,115 @@
+import inspect
+import os
+import threading
+
+from artifact_store import file_digest
+
+
+class ChunkProgress:
+    # Stands in for the `progress` module argument of infer_process, which only calls progress.tqdm(batches)
+    def __init__(self, callback):
+        self.callback = callback
+
+    def tqdm(self, iterable):
+        items = list(iterable)
+        total = len(items)
+        for i, item in enumerate(items):
+            yield item
+            self.callback(int((i + 1) * 100 / total))
+
+
+class TTSEngine:
+    def __init__(self, model_type="F5-TTS", vocoder_name="vocos", device=None, ckpt_file="", artifact_store=None):
+        self.model_type = model_type
+        self.vocoder_name = vocoder_name
+        self.device = device
+        self.ckpt_file = ckpt_file
+        self.artifact_store = artifact_store
+        self.tts = None
+        self.load_error = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self):
+        return self._ready.is_set() and self.tts is not None
+
+    def load(self):
+        # Heavy imports live here so the UI can start before torch is imported
+        try:
+            from f5_tts.api import F5TTS
+
+            self.tts = F5TTS(
+                model_type=self.model_type, vocoder_name=self.vocoder_name, ckpt_file=self.ckpt_file, device=self.device
+            )
+        except Exception as e:
+            self.load_error = e
+            raise
+        finally:
+            self._ready.set()
+
+    def wait_until_ready(self, timeout=None):
+        if not self._ready.wait(timeout):
+            raise TimeoutError("TTS engine is still loading")
+        if self.tts is None:
+            raise RuntimeError(f"TTS engine failed to load: {self.load_error}")
+
+    def generate(self, text, ref_audio, output_path, ref_text="", progress_callback=None, **infer_kwargs):
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        params = self.infer_params(infer_kwargs)
+        if self.artifact_store is None or params["seed"] == -1:  # a random take is never served from the cache
+            segments, _ = self._generate(text, ref_audio, output_path, ref_text, progress_callback, **infer_kwargs)
+            return output_path, segments
+
+        # Cached by model, voice content, texts and the effective inference parameters (nfe_step, cfg_strength,
+        # speed, seed...), a hit needs no model, so it doesn't wait for loading
+        key = self.artifact_store.key(
+            "tts",
+            model_type=self.model_type,
+            vocoder_name=self.vocoder_name,
+            ckpt_file=self.ckpt_file,
+            voice=file_digest(ref_audio),
+            ref_text=ref_text,
+            text=text,
+            **params,
+        )
+
+        def produce(path):
+            segments, seed = self._generate(text, ref_audio, path, ref_text, progress_callback, **infer_kwargs)
+            return {"chunk_segments": segments, "seed": seed}
+
+        metadata = self.artifact_store.cached(key, ".wav", output_path, produce)
+        if progress_callback:
+            progress_callback(100)
+        return output_path, [tuple(segment) for segment in metadata["chunk_segments"]]
+
+    def infer_params(self, infer_kwargs):
+        # F5TTS.infer parameters with their defaults filled in, so a changed default invalidates cached audio
+        from f5_tts.api import F5TTS
+
+        skip = {"self", "ref_file", "ref_text", "gen_text", "show_info", "progress", "file_wave", "file_spect"}
+        params = {
+            name: parameter.default
+            for name, parameter in inspect.signature(F5TTS.infer).parameters.items()
+            if name not in skip
+        }
+        params.update(infer_kwargs)
+        return params
+
+    def _generate(self, text, ref_audio, output_path, ref_text, progress_callback, **infer_kwargs):
+        self.wait_until_ready()
+
+        # The model is shared, so generations are serialised
+        with self._lock:
+            self.tts.infer(
+                ref_file=ref_audio,
+                ref_text=ref_text,
+                gen_text=text,
+                progress=ChunkProgress(progress_callback or (lambda value: None)),
+                file_wave=output_path,
+                **infer_kwargs,
+            )
+            return list(self.tts.chunk_segments), self.tts.seed
@@ -0,0 +1,108 @@
+import subprocess
+
+from artifact_store import file_digest
+
+# x264 speed/quality trade-offs, software only so renders look the same on every machine
+RENDER_PRESETS = {
+    "fast": {"preset": "veryfast", "crf": 23},
+    "balanced": {"preset": "medium", "crf": 20},
+    "quality": {"preset": "slow", "crf": 18},
+}
+DEFAULT_RENDER_PRESET = "fast"
+
+SUBTITLE_STYLE = (
+    "Alignment=10,Fontsize=15,PrimaryColour=&HFFFFFF&,BackColour=&H80000000&,"
+    "BorderStyle=2,Outline=1,Shadow=0,MarginV=10,FontName=Arial"
+)
+
+
+def probe_duration(path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", path],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip())
+
+
+def subtitles_filter(srt_path):
+    # Paths inside a filtergraph need forward slashes and escaped colons (Windows drive letters)
+    path = srt_path.replace("\\", "/").replace(":", "\\:")
+    return f"subtitles='{path}':force_style='{SUBTITLE_STYLE}'"
+
+
+def build_render_command(
+    video_path, audio_path, output_path, duration, srt_path=None, preset=DEFAULT_RENDER_PRESET, tune=None
+):
+    # One pass: the video is looped (or cut) to the audio length, subtitles are burned in only when given,
+    # otherwise the video stream is copied as is and only the audio is encoded
+    command = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats", "-y",
+        "-stream_loop", "-1", "-i", video_path,
+        "-i", audio_path,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-t", f"{duration:.3f}",
+    ]  # fmt: skip
+    if srt_path:
+        settings = RENDER_PRESETS[preset]
+        command += ["-vf", subtitles_filter(srt_path), "-c:v", "libx264", "-preset", settings["preset"]]
+        command += ["-crf", str(settings["crf"]), "-pix_fmt", "yuv420p"]
+        if tune:
+            command += ["-tune", tune]
+    else:
+        command += ["-c:v", "copy"]
+    command += ["-c:a", "aac", "-movflags", "+faststart", "-progress", "pipe:1", output_path]
+    return command
+
+
+def render_video(
+    video_path,
+    audio_path,
+    output_path,
+    srt_path=None,
+    preset=DEFAULT_RENDER_PRESET,
+    tune=None,
+    progress_callback=None,
+    artifact_store=None,
+):
+    # Streams ffmpeg's -progress output, progress_callback gets the rendered fraction of the audio length
+    if artifact_store is not None:
+        # Cached by the content of every input and all the encoding settings, subtitle style included
+        key = artifact_store.key(
+            "render",
+            video=file_digest(video_path),
+            audio=file_digest(audio_path),
+            subtitles=file_digest(srt_path) if srt_path else None,
+            settings=RENDER_PRESETS[preset] if srt_path else "copy",
+            tune=tune if srt_path else None,
+            style=SUBTITLE_STYLE if srt_path else None,
+        )
+
+        def produce(path):
+            render_video(video_path, audio_path, path, srt_path, preset, tune, progress_callback)
+
+        artifact_store.cached(key, ".mp4", output_path, produce)
+        if progress_callback:
+            progress_callback(1.0)
+        return output_path
+
+    duration = probe_duration(audio_path)
+    command = build_render_command(video_path, audio_path, output_path, duration, srt_path, preset, tune)
+
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace"
+    )
+    errors = []
+    for line in process.stdout:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            errors.append(line.strip())  # log lines share the pipe with the progress report
+        elif key == "out_time_us" and value.isdigit() and progress_callback:
+            progress_callback(min(int(value) / (duration * 1e6), 1.0))
+        elif key == "progress" and value == "end" and progress_callback:
+            progress_callback(1.0)
+
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed with exit code {process.returncode}: {' '.join(errors[-5:])}")
+    return output_path